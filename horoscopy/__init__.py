@@ -0,0 +1,45 @@
+#
+# Copyright (c) 2022 Kumitaka Izumi
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+
+import importlib
+
+# Module of each system which has its compute_* function and main()
+SYSTEMS = {
+    "kubo": "make_chart",
+    "shibi": "make_chart",
+    "shuku": "make_chart",
+    "suhi": "make_chart",
+    "rune": "one_oracle",
+}
+
+__all__ = ["compute_" + system for system in SYSTEMS]
+
+
+def get_module(system):
+    return importlib.import_module(".%s.%s" % (system, SYSTEMS[system]), __name__)
+
+
+def __getattr__(name):
+    if name in __all__:
+        return getattr(get_module(name[len("compute_") :]), name)
+    raise AttributeError("module %r has no attribute %r" % (__name__, name))
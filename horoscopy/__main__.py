@@ -0,0 +1,52 @@
+#
+# Copyright (c) 2022 Kumitaka Izumi
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+
+import argparse
+
+from . import SYSTEMS, get_module
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="horoscopy", description="Make a chart")
+    parser.add_argument(
+        "system",
+        choices=list(SYSTEMS) + ["batch", "serve"],
+        help="System to use, batch for records in a file, or serve for HTTP",
+    )
+    parser.add_argument("args", nargs=argparse.REMAINDER, help="Its arguments")
+    args = parser.parse_args(argv)
+
+    if args.system == "batch":
+        from . import batch
+
+        batch.main(args.args)
+    elif args.system == "serve":
+        from . import server
+
+        server.main(args.args)
+    else:
+        get_module(args.system).main(args.args)
+
+
+if __name__ == "__main__":
+    main()
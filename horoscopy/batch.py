@@ -0,0 +1,465 @@
+#
+# Copyright (c) 2022 Kumitaka Izumi
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+
+import argparse
+import collections
+import concurrent.futures
+import csv
+import datetime
+import io
+import itertools
+import json
+import os
+import signal
+import sys
+
+from . import get_module, stages
+from .cache import CACHE_SIZE, get_cache, get_salt
+from .metrics import Metrics
+from .output import FORMATS, Writer, to_data
+from .shibi.eot import METHODS
+
+# Systems computed from birth records
+SYSTEMS = ["kubo", "shibi", "shuku", "suhi"]
+
+FIELDS = ["date", "time", "gender", "place", "name"]
+
+# Number of records sent to a worker at once
+CHUNK_SIZE = 256
+
+# Fields of a chart which depend on the day it is read, where the JSON of the
+# others is cached with its natal chart
+PROJECTED_FIELDS = {
+    "shibi": {"now", "old", "shogen", "taigen"},
+    "shuku": {"check_year", "check_month", "rokugai_days", "days"},
+}
+
+
+class BadRecord:
+    # A line of the input which is not a record, which is reported as an error
+    # of every system, so the records after it are still computed
+    def __init__(self, message):
+        self.message = message
+
+
+def parse_date(text):
+    year, month, day = [
+        int(x) for x in text.replace("/", ".").replace("-", ".").split(".")
+    ]
+    return datetime.date(year, month, day)
+
+
+def parse_time(text):
+    if not text:
+        return None
+    split_time = [int(x) for x in text.split(":")]
+    if len(split_time) == 1:
+        return datetime.time(split_time[0])
+    if len(split_time) == 2:
+        return datetime.time(*split_time)
+    raise ValueError("Unexpected time")
+
+
+def parse_check(text):
+    if not text:
+        return None
+    year, month = [int(x) for x in text.replace("/", ".").split(".")]
+    return year, month
+
+
+def get_args(system, record, options):
+    # Normalized arguments of the natal chart, which identify it, and those of
+    # its projection on the day the chart is read
+    date = parse_date(record["date"])
+    time = parse_time(record.get("time"))
+    if system == "kubo":
+        return (date, time), ()
+    as_of = options["as_of"]
+    if system == "shibi":
+        if time is None:
+            raise ValueError("No time")
+        gender = (record.get("gender") or "")[:1].upper()
+        place = (record.get("place") or "").strip() or None
+        return (date, time, gender, place, options["eot"]), (as_of,)
+    if system == "shuku":
+        check = options["check"] or (as_of.year, as_of.month)
+        return (date,), (tuple(check),)
+    if system == "suhi":
+        return (date, record.get("name") or ""), ()
+    raise ValueError("Unknown system: %s" % system)
+
+
+def compute_natal(system, *args):
+    # The whole chart of a system which does not depend on the day it is read
+    module = get_module(system)
+    if system in ("shibi", "shuku"):
+        return module.compute_natal(*args)
+    return getattr(module, "compute_" + system)(*args)
+
+
+def project(system, natal, args):
+    module = get_module(system)
+    if system == "shibi":
+        (as_of,) = args
+        return module.make_chart(natal, module.project(natal, as_of))
+    if system == "shuku":
+        (check,) = args
+        return module.make_chart(natal, check)
+    return natal
+
+
+def render_fields(system, chart):
+    # JSON of each field of a chart which does not depend on the day it is read
+    projected = PROJECTED_FIELDS.get(system, ())
+    return {
+        k: json.dumps(to_data(v), ensure_ascii=False)
+        for k, v in vars(chart).items()
+        if k not in projected
+    }
+
+
+def get_natal(system, record, options):
+    # (natal chart, JSON of its fields or None, arguments of its projection),
+    # where only natal charts are cached, so a cached one is read on any day
+    # without being computed or serialized again
+    natal_args, args = get_args(system, record, options)
+    cache = options.get("cache")
+    if cache is None:
+        return compute_natal(system, *natal_args), None, args
+
+    def compute(*natal_args):
+        natal = compute_natal(system, *natal_args)
+        return natal, render_fields(system, project(system, natal, args))
+
+    natal, fields = get_cache(*cache).get_or_compute(system, natal_args, compute)
+    return natal, fields, args
+
+
+def compute_chart(system, record, options):
+    natal, _, args = get_natal(system, record, options)
+    return project(system, natal, args)
+
+
+def render_chart(system, record, output_format, options):
+    # JSON or text of a chart, where only the fields which depend on the day
+    # are serialized for a cached natal chart
+    natal, fields, args = get_natal(system, record, options)
+    chart = project(system, natal, args)
+    if output_format != "json":
+        return get_module(system).format_chart(chart)
+    timer = stages.timer("output/")
+    if fields is None:
+        text = json.dumps(to_data(chart), ensure_ascii=False)
+    else:
+        # Same as json.dumps() of the whole chart
+        parts = []
+        for k, v in vars(chart).items():
+            value = fields.get(k)
+            if value is None:
+                value = json.dumps(to_data(v), ensure_ascii=False)
+            parts.append("%s: %s" % (json.dumps(k), value))
+        text = "{" + ", ".join(parts) + "}"
+    timer.lap("json")
+    return text
+
+
+def format_record(index, record, systems, output_format, options):
+    # A line of NDJSON or a block of text, where errors are reported per
+    # system, so a system which fails does not drop the others
+    texts = {}
+    errors = {}
+    for system in systems:
+        if isinstance(record, BadRecord):
+            errors[system] = record.message
+            continue
+        try:
+            texts[system] = render_chart(system, record, output_format, options)
+        except Exception as e:
+            errors[system] = "%s: %s" % (type(e).__name__, e)
+
+    if output_format == "json":
+        # Same as json.dumps() of the whole record
+        line = '{"index": %d' % index
+        for system, text in texts.items():
+            line += ', "%s": %s' % (system, text)
+        if errors:
+            line += ', "errors": ' + json.dumps(errors, ensure_ascii=False)
+        return line + "}\n"
+
+    text = ""
+    for system in systems:
+        text += "[%d] %s\n" % (index, system)
+        if system in texts:
+            text += texts[system] + "\n"
+        else:
+            text += errors[system] + "\n\n"
+    return text
+
+
+def format_chunk(start, records, systems, output_format, options):
+    # Charts of a chunk are joined, so a worker returns a single string
+    texts = []
+    for index, record in enumerate(records, start=start):
+        texts.append(format_record(index, record, systems, output_format, options))
+    return "".join(texts)
+
+
+def profile_chunk(start, records, systems, output_format, options):
+    # The stages of a worker are returned with the chunk to be added up
+    with stages.Profile() as profile:
+        text = format_chunk(start, records, systems, output_format, options)
+    return text, profile.stages
+
+
+def preload(systems):
+    # Resources are loaded once per process by computing a sample chart
+    record = {
+        "date": "2000.01.01",
+        "time": "12:00",
+        "gender": "M",
+        "place": "東京",
+        "name": "Taro Yamada",
+    }
+    options = {"eot": "table", "check": (2000, 1), "as_of": datetime.date(2000, 1, 1)}
+    for system in systems:
+        compute_chart(system, record, options)
+
+
+def init_worker(systems):
+    preload(systems)
+
+
+def read_records(stream, input_format):
+    # Records, or a BadRecord for a line of NDJSON which is not one
+    if input_format == "csv":
+        for row in csv.DictReader(stream):
+            yield row
+    else:
+        for number, line in enumerate(stream, start=1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                yield BadRecord("%s: input line %d: %s" % (type(e).__name__, number, e))
+                continue
+            if not isinstance(record, dict):
+                yield BadRecord("ValueError: input line %d: Not an object" % number)
+                continue
+            yield record
+
+
+def run(
+    records,
+    writer,
+    systems,
+    output_format,
+    options,
+    jobs=None,
+    chunk_size=CHUNK_SIZE,
+    metrics=None,
+):
+    # Chunks are computed in parallel and written in the order of records,
+    # while at most two chunks per worker are kept in memory
+    if jobs is None:
+        jobs = os.cpu_count() or 1
+    chunks = iter(lambda: list(itertools.islice(records, chunk_size)), [])
+    args = (systems, output_format, options)
+    profile = stages.get_profile()
+
+    if jobs == 1:
+        start = 0
+        for chunk in chunks:
+            writer.write(format_chunk(start, chunk, *args))
+            start += len(chunk)
+            count_charts(metrics, systems, len(chunk))
+        return
+
+    with concurrent.futures.ProcessPoolExecutor(
+        max_workers=jobs, initializer=init_worker, initargs=(systems,)
+    ) as executor:
+        function = format_chunk if profile is None else profile_chunk
+        futures = collections.deque()
+        start = 0
+        for chunk in chunks:
+            futures.append((len(chunk), executor.submit(function, start, chunk, *args)))
+            start += len(chunk)
+            if len(futures) >= 2 * jobs:
+                count, future = futures.popleft()
+                write_result(writer, future.result(), profile)
+                count_charts(metrics, systems, count)
+        while futures:
+            count, future = futures.popleft()
+            write_result(writer, future.result(), profile)
+            count_charts(metrics, systems, count)
+
+
+def write_result(writer, result, profile):
+    if profile is None:
+        writer.write(result)
+    else:
+        text, worker_stages = result
+        writer.write(text)
+        profile.merge(worker_stages)
+
+
+def count_charts(metrics, systems, count):
+    # Charts written, including records with an error
+    if metrics is not None:
+        for system in systems:
+            metrics.inc("horoscopy_charts_total", count, system=system)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="horoscopy batch", description="Make charts of birth records"
+    )
+    parser.add_argument(
+        "input", type=str, help="CSV or NDJSON file of records, or - for stdin"
+    )
+    parser.add_argument(
+        "--input-format",
+        choices=["csv", "ndjson"],
+        default=None,
+        type=str,
+        help="Format of the input, which is guessed from its extension by default",
+    )
+    parser.add_argument(
+        "--systems",
+        default=",".join(SYSTEMS),
+        type=str,
+        help="Comma-separated systems, e.g., kubo,shibi",
+    )
+    parser.add_argument(
+        "--format",
+        choices=FORMATS,
+        default="json",
+        type=str,
+        help="Output format, where json is NDJSON",
+    )
+    parser.add_argument("--output", default=None, type=str, help="Output file")
+    parser.add_argument(
+        "--jobs", default=None, type=int, help="Number of worker processes"
+    )
+    parser.add_argument(
+        "--chunk-size",
+        default=CHUNK_SIZE,
+        type=int,
+        help="Number of records per task",
+    )
+    parser.add_argument(
+        "--eot",
+        choices=METHODS,
+        default="smart",
+        type=str,
+        help="Method to compute equation of time for shibi",
+    )
+    parser.add_argument(
+        "--check",
+        default=None,
+        type=str,
+        help="Month and year to be checked for shuku, e.g., 2010.01",
+    )
+    parser.add_argument(
+        "--as-of",
+        default=None,
+        type=str,
+        help="Date of the reading, e.g., 2020.01.01, which is today by default",
+    )
+    parser.add_argument(
+        "--cache",
+        default=None,
+        type=str,
+        help="SQLite file of computed charts, which is shared by runs",
+    )
+    parser.add_argument(
+        "--cache-size",
+        default=CACHE_SIZE >> 20,
+        type=int,
+        help="Cap of the cache file in MiB",
+    )
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        const="-",
+        default=None,
+        type=str,
+        help="Print the time of each stage, or write it to a JSON file",
+    )
+    args = parser.parse_args(argv)
+
+    systems = args.systems.split(",")
+    for system in systems:
+        if system not in SYSTEMS:
+            parser.error("unknown system: %s" % system)
+
+    input_format = args.input_format
+    if input_format is None:
+        ext = os.path.splitext(args.input)[1].lower()
+        input_format = "ndjson" if ext in (".ndjson", ".jsonl", ".json") else "csv"
+
+    # Every record is read on the same day, even if the batch passes midnight
+    as_of = datetime.date.today() if args.as_of is None else parse_date(args.as_of)
+    options = {"eot": args.eot, "check": parse_check(args.check), "as_of": as_of}
+    if args.cache is not None:
+        # The salt is computed once here instead of in every worker
+        filename = os.path.abspath(args.cache)
+        options["cache"] = (filename, args.cache_size << 20, get_salt())
+
+    if args.input == "-":
+        stream = io.TextIOWrapper(sys.stdin.buffer, encoding="utf-8", newline="")
+    else:
+        stream = open(args.input, encoding="utf-8", newline="")
+    output = None if args.output is None else open(args.output, "w", encoding="utf-8")
+
+    # kill -USR1 dumps the metrics to stderr while the batch runs, where the
+    # stages are measured with --profile only
+    metrics = Metrics()
+    if hasattr(signal, "SIGUSR1"):
+        handler = signal.signal(
+            signal.SIGUSR1,
+            lambda *_: sys.stderr.write(metrics.export(stages.get_profile())),
+        )
+    try:
+        with stages.profiling(args.profile), Writer(output) as writer:
+            records = read_records(stream, input_format)
+            run(
+                records,
+                writer,
+                systems,
+                args.format,
+                options,
+                args.jobs,
+                args.chunk_size,
+                metrics,
+            )
+    finally:
+        if hasattr(signal, "SIGUSR1"):
+            signal.signal(signal.SIGUSR1, handler)
+        stream.close()
+        if output is not None:
+            output.close()
+
+
+if __name__ == "__main__":
+    main()
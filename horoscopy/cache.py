@@ -0,0 +1,176 @@
+#
+# Copyright (c) 2022 Kumitaka Izumi
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+
+import hashlib
+import pickle
+import threading
+import time
+
+from . import SYSTEMS
+from .registry import get_registry
+
+# Must be bumped by any change of the code which changes the output of charts,
+# including a new field in their JSON, so cached charts are not served as they
+# were; a change of the resources invalidates them by itself
+# 2: taigen of shibi
+# 3: natal charts and the JSON of their fields instead of rendered charts
+ENGINE_VERSION = 3
+
+# Cap of the cache file in bytes of charts
+CACHE_SIZE = 1 << 30
+
+# Ratio of the cap which eviction goes down to, so it does not run on every put
+LOW_WATER = 0.9
+
+SCHEMA = [
+    "CREATE TABLE IF NOT EXISTS charts "
+    "(key BLOB PRIMARY KEY, value BLOB, size INTEGER, used INTEGER)",
+    "CREATE INDEX IF NOT EXISTS charts_used ON charts (used)",
+    "CREATE TABLE IF NOT EXISTS total (size INTEGER)",
+    "INSERT INTO total SELECT 0 WHERE NOT EXISTS (SELECT * FROM total)",
+    # The total is kept by the writes themselves, so it is never recounted
+    "CREATE TRIGGER IF NOT EXISTS charts_insert AFTER INSERT ON charts "
+    "BEGIN UPDATE total SET size = size + NEW.size; END",
+    "CREATE TRIGGER IF NOT EXISTS charts_update AFTER UPDATE OF size ON charts "
+    "BEGIN UPDATE total SET size = size + NEW.size - OLD.size; END",
+    "CREATE TRIGGER IF NOT EXISTS charts_delete AFTER DELETE ON charts "
+    "BEGIN UPDATE total SET size = size - OLD.size; END",
+]
+
+
+def get_salt():
+    # Charts are valid for a version of the code and of every res directory,
+    # which takes reading every res file, so it is passed to batch workers
+    digest = hashlib.sha256(b"%d" % ENGINE_VERSION)
+    for system in SYSTEMS:
+        digest.update(get_registry("horoscopy." + system).checksum().encode())
+    return digest.digest()
+
+
+class ChartCache:
+    def __init__(self, filename, max_bytes=CACHE_SIZE, salt=None):
+        import sqlite3
+
+        # Every write is a transaction, so processes share the file safely
+        self.filename = filename
+        self.max_bytes = max_bytes
+        self.conn = sqlite3.connect(
+            filename, timeout=60, isolation_level=None, check_same_thread=False
+        )
+        self.lock = threading.Lock()
+        self.salt = get_salt() if salt is None else salt
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        with self.lock:
+            self.conn.execute("PRAGMA journal_mode = WAL")
+            self.conn.execute("PRAGMA synchronous = NORMAL")
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                for sql in SCHEMA:
+                    self.conn.execute(sql)
+            finally:
+                self.conn.execute("COMMIT")
+
+    def get_key(self, system, args):
+        # args are the normalized arguments of the compute function
+        text = "%s%r" % (system, args)
+        return hashlib.sha256(self.salt + text.encode("utf-8")).digest()
+
+    def get(self, key):
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT value FROM charts WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.conn.execute(
+                "UPDATE charts SET used = ? WHERE key = ?", (time.time_ns(), key)
+            )
+            self.hits += 1
+        return pickle.loads(row[0])
+
+    def put(self, key, chart):
+        data = pickle.dumps(chart, pickle.HIGHEST_PROTOCOL)
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                self.conn.execute(
+                    "INSERT INTO charts VALUES (?, ?, ?, ?) ON CONFLICT (key) "
+                    "DO UPDATE SET value = excluded.value, size = excluded.size, "
+                    "used = excluded.used",
+                    (key, data, len(data), time.time_ns()),
+                )
+                self.evict()
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+            self.conn.execute("COMMIT")
+
+    def evict(self):
+        # Least recently used charts go until the total is under the low water
+        (total,) = self.conn.execute("SELECT size FROM total").fetchone()
+        if total <= self.max_bytes:
+            return
+        goal = total - int(self.max_bytes * LOW_WATER)
+        keys = []
+        freed = 0
+        for key, size in self.conn.execute(
+            "SELECT key, size FROM charts ORDER BY used"
+        ):
+            keys.append((key,))
+            freed += size
+            if freed >= goal:
+                break
+        self.conn.executemany("DELETE FROM charts WHERE key = ?", keys)
+        self.evictions += len(keys)
+
+    def get_or_compute(self, system, args, compute):
+        key = self.get_key(system, args)
+        chart = self.get(key)
+        if chart is None:
+            chart = compute(*args)
+            self.put(key, chart)
+        return chart
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+_caches = {}
+_lock = threading.Lock()
+
+
+def get_cache(filename, max_bytes=CACHE_SIZE, salt=None):
+    # One connection per file and process, e.g., per batch worker
+    with _lock:
+        if filename not in _caches:
+            _caches[filename] = ChartCache(filename, max_bytes, salt)
+        return _caches[filename]
+
+
+def get_caches():
+    with _lock:
+        return list(_caches.values())
@@ -1,4 +1,3 @@
-#!/usr/bin/env python
 #
 # Copyright (c) 2022 Kumitaka Izumi
 #
@@ -21,20 +20,8 @@
 # SOFTWARE.
 #
 
-import os
-import random
-
-
-def main():
-    with open(os.path.join("res", "runes.txt")) as f:
-        runes = f.read().splitlines()
-    idx = random.randint(0, len(runes) - 1)
-    print(runes[idx].replace(",", " / "), end=" ")
-
-    directions = ["Upright", "Reversed"]
-    idx = random.randint(0, len(directions) - 1)
-    print("(" + directions[idx] + ")")
 
+from .make_chart import main
 
 if __name__ == "__main__":
     main()
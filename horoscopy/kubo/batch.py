@@ -0,0 +1,168 @@
+#
+# Copyright (c) 2022 Kumitaka Izumi
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+import datetime
+
+import numpy as np
+
+from .make_chart import (
+    get_chishi2gogyo,
+    get_kanshi2kubo,
+    get_setsuiri,
+    get_sol2kanshi,
+    get_tenkan2gogyo,
+    res,
+)
+from .sol2kanshi import KANSHI_OFFSET
+
+EPOCH_ORDINAL = datetime.date(1970, 1, 1).toordinal()
+
+
+class Tables:
+    def __init__(self):
+        _, _, tenkan2num = res.basic("tenkan")
+        kanshi_set, _, _ = res.basic("kanshi")
+        kyusei_set, _, _ = res.basic("kyusei")
+        self.kanshi = np.array(kanshi_set)
+        self.kyusei = np.array(kyusei_set)
+
+        # 天干 of each 六十干支
+        self.kanshi2tenkan = np.array([tenkan2num[k[0]] for k in kanshi_set])
+
+        # 五行 of each 六十干支
+        tenkan2gogyo = get_tenkan2gogyo()
+        chishi2gogyo = get_chishi2gogyo()
+        self.kanshi2gogyo = np.array(
+            [[tenkan2gogyo[k[0]], chishi2gogyo[k[1]]] for k in kanshi_set]
+        )
+
+        # 節入 of each month in epoch minutes
+        self.setsuiri = get_setsuiri()
+        self.instants = np.array(self.setsuiri.instants)
+
+        # 九星 on each switch of 陰遁 and 陽遁
+        calculator = get_sol2kanshi()
+        self.switches = np.array(calculator.switches)
+        self.switch_kyusei = np.array(calculator.kyusei)
+
+        names = [ary[0] for ary in res.table("kubo.txt")]
+        kanshi2kubo = get_kanshi2kubo()
+        self.kanshi2kubo = np.array([names.index(kanshi2kubo[k]) for k in kanshi_set])
+        self.kubo = np.array(names)
+
+        # 中宮傾斜 first, then the others
+        names = ["中宮（" + x + "宮）" for x in res.lines("chugu_keisha.txt")]
+        names += [x + "宮" for x in res.lines("keisha.txt")]
+        self.keisha = np.array(names)
+
+        data = res.table("num2balance.txt")
+        self.balance1 = np.array([x[0] for x in data])
+        self.balance2 = np.array([x[1] for x in data])
+
+
+def get_tables():
+    return res.load("batch", Tables)
+
+
+def to_single(n):
+    return (n - 1) % 9 + 1
+
+
+def make_charts(dates, times=None):
+    tables = get_tables()
+
+    dates = np.asarray(dates, dtype="datetime64[D]")
+    if times is None:
+        has_time = np.zeros(dates.shape, dtype=bool)
+        minutes = np.zeros(dates.shape, dtype="timedelta64[m]")
+    else:
+        times = np.asarray(times, dtype="timedelta64[m]")
+        has_time = ~np.isnat(times)
+        minutes = np.where(has_time, times, np.timedelta64(0, "m"))
+
+    year = dates.astype("datetime64[Y]").astype(int) + 1970
+    month = dates.astype("datetime64[M]").astype(int) % 12 + 1
+    day = (dates - dates.astype("datetime64[M]")).astype(int) + 1
+    hour = minutes.astype(int) // 60
+
+    date = dates + minutes
+    modified_date = dates + (hour == 23)
+
+    # Get solar year and month from 節入
+    t = date.astype("datetime64[m]").astype(int)
+    if np.any((t < tables.instants[0]) | (tables.setsuiri.end <= t)):
+        raise ValueError("Out of range")
+    i = np.searchsorted(tables.instants, t, side="right") - 1
+    y, m = tables.setsuiri.index2solar(i)
+
+    year_kanshi = (y - 1924) % 60
+    year_kyusei = 8 - (y - 1928) % 9
+    month_kanshi = ((y - 1929) * 12 + m + 1) % 60
+    month_kyusei = 8 - ((y - 1929) * 12 + m + 6) % 9
+
+    n = modified_date.astype(int) + EPOCH_ORDINAL
+    if np.any((n < tables.switches[0]) | (tables.switches[-1] < n)):
+        raise ValueError("Out of range")
+    i = np.searchsorted(tables.switches, n, side="right") - 1
+    sign = np.where(i % 2 == 0, -1, 1)
+    day_kyusei = (tables.switch_kyusei[i] - 1 + sign * (n - tables.switches[i])) % 9
+    day_kanshi = (n + KANSHI_OFFSET) % 60
+
+    kubo = tables.kanshi2kubo[day_kanshi]
+
+    bias1 = tables.kanshi2tenkan[day_kanshi] % 5
+    bias2 = np.where(hour == 23, 0, (hour + 1) // 2)
+    hour_kanshi = np.where(has_time, bias1 * 12 + bias2, -1)
+
+    gogyo = np.zeros(dates.shape + (5,), dtype=int)
+    onehot = np.eye(5, dtype=int)
+    for kanshi, mask in [
+        (year_kanshi, True),
+        (month_kanshi, True),
+        (day_kanshi, True),
+        (hour_kanshi, has_time),
+    ]:
+        tenkan_gogyo, chishi_gogyo = tables.kanshi2gogyo[kanshi].T
+        gogyo += onehot[tenkan_gogyo - 1] * np.expand_dims(mask, -1)
+        gogyo += onehot[chishi_gogyo - 1] * np.expand_dims(mask, -1)
+
+    diff = month_kyusei - year_kyusei
+    keisha = np.where(
+        diff == 0, year_kyusei, 9 + np.where(diff > 0, diff - 1, diff + 8)
+    )
+
+    balance = np.stack([to_single(year), to_single(month), to_single(day)], -1) - 1
+
+    return {
+        "year_kanshi": tables.kanshi[year_kanshi],
+        "year_kyusei": tables.kyusei[year_kyusei],
+        "month_kanshi": tables.kanshi[month_kanshi],
+        "month_kyusei": tables.kyusei[month_kyusei],
+        "day_kanshi": tables.kanshi[day_kanshi],
+        "day_kyusei": tables.kyusei[day_kyusei],
+        "kubo": tables.kubo[kubo],
+        "hour_kanshi": np.where(has_time, tables.kanshi[hour_kanshi], ""),
+        "keisha": tables.keisha[keisha],
+        "gogyo": gogyo,
+        "balance1": tables.balance1[balance],
+        "balance2": tables.balance2[balance],
+    }
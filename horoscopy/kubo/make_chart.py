@@ -0,0 +1,357 @@
+#!/usr/bin/env python
+#
+# Copyright (c) 2022 Kumitaka Izumi
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+import argparse
+import datetime
+import sys
+
+from .. import stages
+from ..output import FORMATS, Writer, dump_json
+from ..registry import get_registry
+from .setsuiri import Setsuiri
+from .sol2kanshi import Sol2KanshiCalculator
+
+res = get_registry(__package__)
+
+
+def to_single(n):
+    n = int(n)
+    while n >= 10:
+        n = sum([int(i) for i in str(n)])
+    return n
+
+
+def get_tenkan2gogyo():
+    def loader():
+        names = res.basic("tenkan").names
+        data = res.lines("tenkan2gogyo.txt")
+        return {names[i]: int(data[i]) for i in range(len(names))}
+
+    return res.mapping("tenkan2gogyo", loader)
+
+
+def get_chishi2gogyo():
+    def loader():
+        names = res.basic("chishi").names
+        data = res.lines("chishi2gogyo.txt")
+        return {names[i]: int(data[i]) for i in range(len(names))}
+
+    return res.mapping("chishi2gogyo", loader)
+
+
+def get_kanshi2kubo():
+    def loader():
+        kanshi2kubo = {}
+        for ary in res.table("kubo.txt"):
+            for kanshi in ary[1:]:
+                kanshi2kubo[kanshi] = ary[0]
+        return kanshi2kubo
+
+    return res.mapping("kanshi2kubo", loader)
+
+
+def get_setsuiri():
+    return res.load("setsuiri", lambda: Setsuiri(res.lines("setsuiri.txt")))
+
+
+def get_sol2kanshi():
+    def loader():
+        return Sol2KanshiCalculator(res.lines("sol2kanshi/res/inton_yoton.txt"))
+
+    return res.load("sol2kanshi", loader)
+
+
+class Circle:
+    def __init__(self, num):
+        self.num = num
+        self.green_day = None
+        self.green_month = None
+        self.green_year = None
+        self.white_month = None
+        self.white_year = None
+
+
+class GogyoCount:
+    def __init__(self):
+        self.count = [0, 0, 0, 0, 0]
+        self.tenkan2gogyo = get_tenkan2gogyo()
+        self.chishi2gogyo = get_chishi2gogyo()
+
+    def add(self, kanshi):
+        tenkan_gogyo = self.tenkan2gogyo[kanshi[0]]
+        self.count[tenkan_gogyo - 1] += 1
+
+        chishi_gogyo = self.chishi2gogyo[kanshi[1]]
+        self.count[chishi_gogyo - 1] += 1
+
+
+class Chart:
+    def __init__(self, date, time):
+        self.date = date
+        self.time = time
+        self.year_kanshi = ""
+        self.year_kyusei = ""
+        self.month_kanshi = ""
+        self.month_kyusei = ""
+        self.day_kanshi = ""
+        self.day_kyusei = ""
+        self.hour_kanshi = None
+        self.kubo = ""
+        self.keisha = ""
+        self.is_chugu_keisha = False
+        self.gogyo = []
+        self.balance1 = []
+        self.balance2 = []
+        self.circles = []
+
+
+def compute_kubo(date, time=None):
+    timer = stages.timer("kubo/")
+    chart = Chart(date, time)
+    year, month, day = date.year, date.month, date.day
+
+    # Modify date
+    if time is None:
+        hour, minute = 0, 0
+    else:
+        hour, minute = time.hour, time.minute
+    date = datetime.datetime(year, month, day, hour=hour, minute=minute)
+    if date.hour == 23:
+        delta = datetime.timedelta(days=1)
+        modified_date = date + delta
+    else:
+        modified_date = date
+
+    # Get solar year and month from 節入
+    y, m = get_setsuiri().lookup(date)
+    timer.lap("setsuiri")
+
+    _, _, tenkan2num = res.basic("tenkan")
+    chishi_set, _, chishi2num = res.basic("chishi")
+    gogyo_count = GogyoCount()
+
+    _, num2kanshi, _ = res.basic("kanshi")
+    year_kanshi = num2kanshi[(y - 1924) % len(num2kanshi)]
+    gogyo_count.add(year_kanshi)
+    chart.year_kanshi = year_kanshi
+
+    _, num2kyusei, kyusei2num = res.basic("kyusei")
+    year_kyusei = num2kyusei[8 - (y - 1928) % len(num2kyusei)]
+    chart.year_kyusei = year_kyusei
+
+    month_kanshi = num2kanshi[((y - 1929) * 12 + m + 1) % len(num2kanshi)]
+    gogyo_count.add(month_kanshi)
+    chart.month_kanshi = month_kanshi
+
+    month_kyusei = num2kyusei[8 - ((y - 1929) * 12 + m + 6) % len(num2kyusei)]
+    chart.month_kyusei = month_kyusei
+    timer.lap("kanshi")
+
+    day_kyusei, day_kanshi = get_sol2kanshi().lookup(modified_date)
+    day_kanshi = num2kanshi[day_kanshi]
+    day_kyusei = num2kyusei[day_kyusei - 1]
+    gogyo_count.add(day_kanshi)
+    chart.day_kanshi = day_kanshi
+    chart.day_kyusei = day_kyusei
+
+    kubo = get_kanshi2kubo()[day_kanshi]
+    chart.kubo = kubo
+
+    if time is not None:
+        bias1 = tenkan2num[day_kanshi[0]] % 5
+        bias2 = 0 if hour == 23 else (hour + 1) // 2
+        hour_kanshi = num2kanshi[bias1 * 12 + bias2]
+        gogyo_count.add(hour_kanshi)
+        chart.hour_kanshi = hour_kanshi
+    timer.lap("sol2kanshi")
+
+    if year_kyusei == month_kyusei:
+        keisha_set = res.lines("chugu_keisha.txt")
+        num = kyusei2num[year_kyusei]
+        chart.keisha = keisha_set[num]
+        chart.is_chugu_keisha = True
+    else:
+        keisha_set = res.lines("keisha.txt")
+        num1 = kyusei2num[year_kyusei]
+        num2 = kyusei2num[month_kyusei]
+        if num2 > num1:
+            idx = num2 - num1 - 1
+        else:
+            idx = num2 - num1 + len(keisha_set)
+        chart.keisha = keisha_set[idx]
+    timer.lap("keisha")
+
+    chart.gogyo = gogyo_count.count
+
+    num2balance = res.table("num2balance.txt")
+    for n in [year, month, day]:
+        b1, b2 = num2balance[to_single(n) - 1]
+        chart.balance1.append(b1)
+        chart.balance2.append(b2)
+    timer.lap("balance")
+
+    circles = [Circle(12 if i == 0 else i) for i in range(12)]
+    chart.circles = circles
+
+    n = month
+    s = 1
+    for i in range(12):
+        circles[(s + i) % 12].green_month = (n - 1 + i) % 12 + 1
+
+    n = to_single(day)
+    s = 1
+    for i in range(12):
+        circles[(s + i) % 12].green_day = to_single(n + i)
+
+    n = to_single(year)
+    s = 1
+    for i in range(12):
+        circles[(s + i) % 12].green_year = to_single(n + i)
+
+    tenkan = month_kanshi[0]
+    is_yokan = tenkan2num[tenkan] % 2 == 0
+
+    n = chishi2num[kubo[0]]
+    s = 1 if is_yokan else 0
+    for i in range(12):
+        circles[(s + i) % 12].white_month = (n + i) % 12 + 1
+
+    tenkan = year_kanshi[0]
+    is_yokan = tenkan2num[tenkan] % 2 == 0
+
+    n = chishi2num[kubo[0]]
+    s = 1 if is_yokan else 0
+    for i in range(12):
+        circles[(s + i) % 12].white_year = chishi_set[(n + i) % 12]
+    timer.lap("circles")
+
+    return chart
+
+
+def format_chart(chart):
+    timer = stages.timer("kubo/")
+    sango_kanshi = res.set("sango_kanshi.txt")
+    ijo_kanshi = res.set("ijo_kanshi.txt")
+
+    def check_seijo_kanshi(kanshi):
+        if kanshi in sango_kanshi:
+            return "# "
+        elif kanshi in ijo_kanshi:
+            return "* "
+        else:
+            return "  "
+
+    lines = []
+    for name, kanshi, kyusei in [
+        ("年", chart.year_kanshi, "本命星：" + chart.year_kyusei),
+        ("月", chart.month_kanshi, "月命星：" + chart.month_kyusei),
+        (
+            "日",
+            chart.day_kanshi,
+            "日命星：" + chart.day_kyusei + "  " + chart.kubo + "空亡",
+        ),
+    ]:
+        lines.append(name + "干支：" + kanshi + check_seijo_kanshi(kanshi) + kyusei)
+
+    if chart.hour_kanshi is not None:
+        kanshi = chart.hour_kanshi
+        lines.append("時干支：" + kanshi + check_seijo_kanshi(kanshi))
+
+    if chart.is_chugu_keisha:
+        lines.append("傾斜宮：中宮（" + chart.keisha + "宮）")
+    else:
+        lines.append("傾斜宮：" + chart.keisha + "宮")
+
+    lines.append("五行数：" + " / ".join([str(x) for x in chart.gogyo]))
+    lines.append("陰中陽：" + " / ".join(chart.balance1))
+    lines.append("＋Ｎ－：" + " / ".join(chart.balance2))
+
+    circles = chart.circles
+    header = "Private Month |"
+    lines.append(" " * len(header) + "".join(["%5d" % x.num for x in circles]))
+    lines.append("-" * len(header) + "-----" * len(circles))
+    for label, values, fmt in [
+        (" Public Month |", [x.green_month for x in circles], "%5d"),
+        ("   Public Day |", [x.green_day for x in circles], "%5d"),
+        ("  Public Year |", [x.green_year for x in circles], "%5d"),
+        ("Private Month |", [x.white_month for x in circles], "%5d"),
+        (" Private Year |", [x.white_year for x in circles], "%4s"),
+    ]:
+        lines.append(label + "".join([fmt % x for x in values]))
+    text = "".join([line + "\n" for line in lines])
+    timer.lap("render")
+    return text
+
+
+def print_chart(chart):
+    sys.stdout.write(format_chart(chart))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Make a chart")
+    parser.add_argument(
+        "--date", required=True, type=str, help="Date, e.g., 2000.01.01"
+    )
+    parser.add_argument(
+        "--time", default=None, type=str, help="Modified time, e.g., 00:00"
+    )
+    parser.add_argument(
+        "--format",
+        choices=FORMATS,
+        default="text",
+        type=str,
+        help="Output format",
+    )
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        const="-",
+        default=None,
+        type=str,
+        help="Print the time of each stage, or write it to a JSON file",
+    )
+    args = parser.parse_args(argv)
+
+    year, month, day = [int(x) for x in args.date.replace("/", ".").split(".")]
+    assert 1 <= month <= 12
+    assert 1 <= day <= 31
+    date = datetime.date(year, month, day)
+    if args.time is None:
+        time = None
+    elif ":" in args.time:
+        hour, minute = [int(x) for x in args.time.split(":")]
+        time = datetime.time(hour, minute)
+    else:
+        time = datetime.time(int(args.time))
+
+    with stages.profiling(args.profile):
+        chart = compute_kubo(date, time)
+        with Writer() as writer:
+            if args.format == "json":
+                writer.write(dump_json(chart, indent=2) + "\n")
+            else:
+                writer.write(format_chart(chart))
+
+
+if __name__ == "__main__":
+    main()
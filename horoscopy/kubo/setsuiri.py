@@ -0,0 +1,65 @@
+#
+# Copyright (c) 2022 Kumitaka Izumi
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+import bisect
+import datetime
+
+EPOCH = datetime.datetime(1970, 1, 1)
+
+
+def to_minutes(date):
+    return (date - EPOCH) // datetime.timedelta(minutes=1)
+
+
+class Setsuiri:
+    def __init__(self, lines):
+        # 節入 of each month in epoch minutes
+        self.instants = []
+        for i, line in enumerate(lines):
+            year, month, day, hour, minute = [int(x) for x in line.split(",")]
+            if i == 0:
+                self.year, self.month = year, month
+            else:
+                assert (year, month) == self.index2month(i)
+            date = datetime.datetime(year, month, day, hour, minute)
+            self.instants.append(to_minutes(date))
+        assert self.instants == sorted(self.instants)
+
+        # The last month lasts at least until the end of the calendar month
+        year, month = self.index2month(len(self.instants))
+        self.end = to_minutes(datetime.datetime(year, month, 1))
+
+    def index2month(self, i):
+        n = self.year * 12 + self.month - 1 + i
+        return n // 12, n % 12 + 1
+
+    def index2solar(self, i):
+        # 寅月, which begins at 立春, is the first month of a solar year
+        n = self.year * 12 + self.month - 2 + i
+        return n // 12, n % 12 + 1
+
+    def lookup(self, date):
+        t = to_minutes(date)
+        if not self.instants[0] <= t < self.end:
+            raise ValueError("Out of range: %s" % date.strftime("%Y.%m.%d %H:%M"))
+        i = bisect.bisect_right(self.instants, t) - 1
+        return self.index2solar(i)
@@ -0,0 +1,98 @@
+#
+# Copyright (c) 2022 Kumitaka Izumi
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+import bisect
+import datetime
+import os
+
+from ..registry import get_registry
+
+# The first day of the switch table
+BASE_ORDINAL = datetime.date(1955, 1, 1).toordinal()
+
+# 1955.01.01 is 壬戌 (58) and 二黒土星 (2) in 陰遁
+BASE_KANSHI = 58
+BASE_KYUSEI = 2
+KANSHI_OFFSET = (BASE_KANSHI - BASE_ORDINAL) % 60
+
+
+class Sol2KanshiCalculator:
+    def __init__(self, lines):
+        # 陰遁 begins at even indices and 陽遁 at odd indices
+        self.switches = []
+        for line in lines:
+            y, m1, d1, m2, d2 = [int(x) for x in line.split(",")]
+            self.switches.append(datetime.date(y, m1, d1).toordinal())
+            if (m2, d2) < (m1, d1):
+                y += 1
+            self.switches.append(datetime.date(y, m2, d2).toordinal())
+
+        # 九星 on each switch, which stays the same as on the day before
+        i = bisect.bisect_right(self.switches, BASE_ORDINAL) - 1
+        assert i == 0
+        self.kyusei = [(BASE_KYUSEI - 1 + BASE_ORDINAL - self.switches[0]) % 9 + 1]
+        for i in range(1, len(self.switches)):
+            days = self.switches[i] - 1 - self.switches[i - 1]
+            self.kyusei.append(self.move(self.kyusei[i - 1], i - 1, days))
+
+        for i, n in enumerate(self.switches):
+            kanshi = (n + KANSHI_OFFSET) % 60
+            assert kanshi == 0 or kanshi == 30
+            if kanshi == 0:
+                assert self.kyusei[i] == (9 if i % 2 == 0 else 1)
+            else:
+                assert self.kyusei[i] == 3 or self.kyusei[i] == 7
+
+    @staticmethod
+    def move(kyusei, i, days):
+        sign = -1 if i % 2 == 0 else 1
+        return (kyusei - 1 + sign * days) % 9 + 1
+
+    def lookup(self, date):
+        n = date.toordinal()
+        if not self.switches[0] <= n <= self.switches[-1]:
+            raise ValueError("Out of range: %s" % date.strftime("%Y.%m.%d"))
+        i = bisect.bisect_right(self.switches, n) - 1
+        kyusei = self.move(self.kyusei[i], i, n - self.switches[i])
+        kanshi = (n + KANSHI_OFFSET) % 60
+        return kyusei, kanshi
+
+
+def main():
+    # Cross-check the calculator with every month file
+    res = get_registry(__package__)
+    root = os.path.join(res.root, "sol2kanshi")
+    calculator = Sol2KanshiCalculator(res.lines("sol2kanshi/res/inton_yoton.txt"))
+    count = 0
+    for year in sorted(x for x in os.listdir(root) if x.isdigit()):
+        for month in range(1, 13):
+            lines = res.lines("sol2kanshi/%s/%02d.txt" % (year, month))
+            for day, line in enumerate(lines, start=1):
+                date = datetime.date(int(year), month, day)
+                expected = tuple(int(x) for x in line.split(","))
+                assert calculator.lookup(date) == expected, date
+                count += 1
+    print("%d days OK" % count)
+
+
+if __name__ == "__main__":
+    main()
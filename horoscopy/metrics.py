@@ -0,0 +1,165 @@
+#
+# Copyright (c) 2022 Kumitaka Izumi
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+
+import array
+import collections
+import sys
+import threading
+import types
+
+from .cache import get_caches
+from .registry import get_registries
+from .stages import BUCKETS
+
+# Caches of computed values, which are reported once their module is imported
+MEMOS = {
+    "shibi.get_layout": ("horoscopy.shibi.make_chart", "get_layout"),
+    "shibi.eot.smart": ("horoscopy.shibi.eot", "smart"),
+    "shibi.resolve_place": ("horoscopy.shibi.place", "resolve_place"),
+    "shuku.get_days": ("horoscopy.shuku.make_chart", "get_days"),
+}
+
+
+class Metrics:
+    def __init__(self):
+        # {(name, labels): value}, where labels are pairs of a label and a value
+        self.counters = collections.Counter()
+        self.lock = threading.Lock()
+
+    def inc(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.counters[key] += value
+
+    def export(self, profile=None):
+        # Prometheus text format of the counters, the stages of the profile,
+        # and the caches of this process
+        out = Exposition()
+        with self.lock:
+            counters = sorted(self.counters.items())
+        for (name, labels), value in counters:
+            out.sample(name, "counter", dict(labels), value)
+
+        if profile is not None:
+            with profile.lock:
+                stages = sorted((k, list(v)) for k, v in profile.stages.items())
+            for stage, (calls, seconds, files, buckets) in stages:
+                name = "horoscopy_stage_seconds"
+                count = 0
+                for bound, n in zip(BUCKETS + ("+Inf",), buckets):
+                    count += n
+                    labels = {"stage": stage, "le": str(bound)}
+                    out.sample(name + "_bucket", "histogram", labels, count, name)
+                out.sample(name + "_sum", "histogram", {"stage": stage}, seconds, name)
+                out.sample(name + "_count", "histogram", {"stage": stage}, calls, name)
+                labels = {"stage": stage}
+                out.sample("horoscopy_stage_files_total", "counter", labels, files)
+
+        for registry in get_registries():
+            counts = {"hit": registry.hits, "miss": registry.misses}
+            for result, value in counts.items():
+                labels = {"system": registry.system, "result": result}
+                out.sample("horoscopy_resource_cache_total", "counter", labels, value)
+            with registry.lock:
+                values = list(registry.cache.values())
+            labels = {"system": registry.system}
+            out.sample(
+                "horoscopy_resident_table_bytes", "gauge", labels, sizeof(values)
+            )
+
+        for cache in get_caches():
+            counts = {
+                "hit": cache.hits,
+                "miss": cache.misses,
+                "eviction": cache.evictions,
+            }
+            for result, value in counts.items():
+                labels = {"file": cache.filename, "result": result}
+                out.sample("horoscopy_chart_cache_total", "counter", labels, value)
+
+        for cache, (module, function) in MEMOS.items():
+            if module not in sys.modules:
+                continue
+            info = getattr(sys.modules[module], function).cache_info()
+            # Entries leave a bounded cache only by eviction
+            counts = {
+                "hit": info.hits,
+                "miss": info.misses,
+                "eviction": info.misses - info.currsize,
+            }
+            for result, value in counts.items():
+                labels = {"cache": cache, "result": result}
+                out.sample("horoscopy_memo_total", "counter", labels, value)
+            labels = {"cache": cache}
+            out.sample("horoscopy_memo_entries", "gauge", labels, info.currsize)
+        return out.text()
+
+
+class Exposition:
+    # Samples are grouped by family, as the format requires
+    def __init__(self):
+        self.families = {}
+
+    def sample(self, name, kind, labels, value, family=None):
+        family = name if family is None else family
+        if family not in self.families:
+            self.families[family] = ["# TYPE %s %s" % (family, kind)]
+        if labels:
+            pairs = ",".join(
+                '%s="%s"' % (k, str(v).replace("\\", "\\\\").replace('"', '\\"'))
+                for k, v in labels.items()
+            )
+            name += "{%s}" % pairs
+        self.families[family].append("%s %s" % (name, format_value(value)))
+
+    def text(self):
+        return "".join([x + "\n" for lines in self.families.values() for x in lines])
+
+
+def format_value(value):
+    if isinstance(value, float):
+        return repr(value)
+    return str(value)
+
+
+def sizeof(obj):
+    # Bytes of the objects reachable from obj, where shared ones count once
+    seen = set()
+    size = 0
+    stack = [obj]
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen:
+            continue
+        seen.add(id(obj))
+        size += sys.getsizeof(obj)
+        if isinstance(obj, (str, bytes, int, float, array.array)):
+            continue
+        if isinstance(obj, (dict, types.MappingProxyType)):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set, frozenset)):
+            stack.extend(obj)
+        elif hasattr(obj, "__dict__"):
+            stack.append(vars(obj))
+    return size
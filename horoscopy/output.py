@@ -0,0 +1,99 @@
+#
+# Copyright (c) 2022 Kumitaka Izumi
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+
+import datetime
+import sys
+
+from . import stages
+
+FORMATS = ["text", "json"]
+
+# Types written as they are
+SCALARS = {bool, int, float, str}
+
+# Number of characters kept by Writer before a single write
+BUFFER_SIZE = 1 << 16
+
+
+def to_data(obj):
+    # JSON-compatible data of a chart, where dates are in ISO 8601
+    if obj is None or type(obj) in SCALARS:
+        return obj
+    if isinstance(obj, (datetime.date, datetime.time)):
+        return obj.isoformat()
+    if isinstance(obj, dict):
+        return {str(k): to_data(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [to_data(x) for x in obj]
+    return {k: to_data(v) for k, v in vars(obj).items()}
+
+
+def dump_json(chart, indent=None):
+    # json is imported on first use, as text output needs none of it
+    import json
+
+    timer = stages.timer("output/")
+    text = json.dumps(to_data(chart), ensure_ascii=False, indent=indent)
+    timer.lap("json")
+    return text
+
+
+class Writer:
+    def __init__(self, stream=None, size=BUFFER_SIZE):
+        # Text is written to the binary buffer of the stream in UTF-8 if any
+        self.stream = stream
+        self.size = size
+        self.parts = []
+        self.length = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.flush()
+
+    def write(self, text):
+        self.parts.append(text)
+        self.length += len(text)
+        if self.length >= self.size:
+            self.flush()
+
+    def write_json(self, chart):
+        # A line of NDJSON
+        self.write(dump_json(chart) + "\n")
+
+    def flush(self):
+        if not self.parts:
+            return
+        text = "".join(self.parts)
+        self.parts = []
+        self.length = 0
+
+        stream = sys.stdout if self.stream is None else self.stream
+        buffer = getattr(stream, "buffer", None)
+        if buffer is None:
+            stream.write(text)
+        else:
+            stream.flush()
+            buffer.write(text.encode("utf-8"))
+        stream.flush()
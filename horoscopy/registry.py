@@ -0,0 +1,161 @@
+#
+# Copyright (c) 2022 Kumitaka Izumi
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+
+import collections
+import importlib
+import marshal
+import os
+import threading
+import types
+
+from . import stages
+
+# Name of the file which replaces the res directory in a zipapp build.  It is a
+# zlib-compressed marshal of {filename: bytes}, which loads much faster than a
+# zip archive with thousands of entries.
+BUNDLE = "res.bundle"
+
+Basic = collections.namedtuple("Basic", ["names", "num2name", "name2num"])
+
+
+def iter_res(root):
+    # (filename, path) of every file in a res directory in a fixed order
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(x for x in dirnames if x != "__pycache__")
+        for name in sorted(filenames):
+            path = os.path.join(dirpath, name)
+            yield os.path.relpath(path, root).replace(os.sep, "/"), path
+
+
+class Registry:
+    def __init__(self, package):
+        # The loader reads files both from a directory and from a zipapp
+        module = importlib.import_module(package)
+        self.package = package
+        self.system = package.rsplit(".", 1)[-1]
+        self.loader = module.__spec__.loader
+        self.directory = os.path.dirname(module.__file__)
+        self.root = os.path.join(self.directory, "res")
+        self.cache = {}
+        self.lock = threading.RLock()
+        # Counted without the lock, so a few may be lost between threads
+        self.hits = 0
+        self.misses = 0
+
+    def load(self, key, loader):
+        # Each resource is loaded at most once per process
+        try:
+            value = self.cache[key]
+            self.hits += 1
+            return value
+        except KeyError:
+            pass
+        with self.lock:
+            if key not in self.cache:
+                self.misses += 1
+                timer = stages.timer("res/")
+                self.cache[key] = loader()
+                timer.lap(self.system)
+            return self.cache[key]
+
+    def bundle(self):
+        def loader():
+            try:
+                data = self.loader.get_data(os.path.join(self.directory, BUNDLE))
+            except OSError:
+                return None
+            import zlib
+
+            return marshal.loads(zlib.decompress(data))
+
+        return self.load("bundle", loader)
+
+    def read_bytes(self, filename):
+        bundle = self.bundle()
+        if bundle is not None:
+            try:
+                return bundle[filename]
+            except KeyError:
+                raise FileNotFoundError(filename) from None
+        return self.loader.get_data(os.path.join(self.root, *filename.split("/")))
+
+    def checksum(self):
+        # SHA-256 of every resource file, read from the bundle in a zipapp
+        def loader():
+            import hashlib
+
+            digest = hashlib.sha256()
+            bundle = self.bundle()
+            if bundle is not None:
+                items = sorted(bundle.items())
+            else:
+                items = ((k, self.read_bytes(k)) for k, _ in iter_res(self.root))
+            for filename, data in items:
+                digest.update(filename.encode("utf-8") + b"\0")
+                digest.update(len(data).to_bytes(8, "little") + data)
+            return digest.hexdigest()
+
+        return self.load("checksum", loader)
+
+    def lines(self, filename):
+        def loader():
+            return tuple(self.read_bytes(filename).decode("utf-8").splitlines())
+
+        return self.load(("lines", filename), loader)
+
+    def table(self, filename):
+        def loader():
+            return tuple(tuple(line.split(",")) for line in self.lines(filename))
+
+        return self.load(("table", filename), loader)
+
+    def set(self, filename):
+        return self.load(("set", filename), lambda: frozenset(self.lines(filename)))
+
+    def basic(self, basename):
+        def loader():
+            names = self.lines("basics/" + basename + ".txt")
+            num2name = types.MappingProxyType(dict(enumerate(names)))
+            name2num = types.MappingProxyType({v: k for k, v in num2name.items()})
+            return Basic(names, num2name, name2num)
+
+        return self.load(("basic", basename), loader)
+
+    def mapping(self, key, loader):
+        return self.load(key, lambda: types.MappingProxyType(loader()))
+
+
+_registries = {}
+_lock = threading.Lock()
+
+
+def get_registry(package):
+    with _lock:
+        if package not in _registries:
+            _registries[package] = Registry(package)
+        return _registries[package]
+
+
+def get_registries():
+    with _lock:
+        return list(_registries.values())
@@ -0,0 +1,94 @@
+#!/usr/bin/env python
+#
+# Copyright (c) 2022 Kumitaka Izumi
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+import argparse
+import random
+import sys
+
+from .. import stages
+from ..output import FORMATS, Writer, dump_json
+from ..registry import get_registry
+
+res = get_registry(__package__)
+
+
+class Chart:
+    def __init__(self, rune, direction):
+        self.rune = rune
+        self.direction = direction
+
+
+def compute_rune(rng=random):
+    timer = stages.timer("rune/")
+    runes = res.lines("runes.txt")
+    idx = rng.randint(0, len(runes) - 1)
+    rune = runes[idx].replace(",", " / ")
+
+    directions = ["Upright", "Reversed"]
+    idx = rng.randint(0, len(directions) - 1)
+    chart = Chart(rune, directions[idx])
+    timer.lap("draw")
+    return chart
+
+
+def format_chart(chart):
+    timer = stages.timer("rune/")
+    text = chart.rune + " (" + chart.direction + ")\n"
+    timer.lap("render")
+    return text
+
+
+def print_chart(chart):
+    sys.stdout.write(format_chart(chart))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Draw a rune")
+    parser.add_argument(
+        "--format",
+        choices=FORMATS,
+        default="text",
+        type=str,
+        help="Output format",
+    )
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        const="-",
+        default=None,
+        type=str,
+        help="Print the time of each stage, or write it to a JSON file",
+    )
+    args = parser.parse_args(argv)
+
+    with stages.profiling(args.profile):
+        chart = compute_rune()
+        with Writer() as writer:
+            if args.format == "json":
+                writer.write(dump_json(chart, indent=2) + "\n")
+            else:
+                writer.write(format_chart(chart))
+
+
+if __name__ == "__main__":
+    main()
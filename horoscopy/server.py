@@ -0,0 +1,353 @@
+#
+# Copyright (c) 2022 Kumitaka Izumi
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+
+import argparse
+import asyncio
+import concurrent.futures
+import datetime
+import http
+import json
+import logging
+import os
+import signal
+import urllib.parse
+
+from . import batch, stages
+from .metrics import Metrics
+from .output import dump_json
+from .rune.one_oracle import compute_rune
+
+SYSTEMS = batch.SYSTEMS + ["rune"]
+
+# Limits of a request
+MAX_HEADER_SIZE = 1 << 16
+MAX_BODY_SIZE = 1 << 24
+
+# Seconds a connection may wait for the next request or its body
+IDLE_TIMEOUT = 30
+
+logger = logging.getLogger(__name__)
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message=None):
+        super().__init__(message or status.phrase)
+        self.status = status
+
+
+def get_options(params):
+    as_of = params.get("as_of")
+    return {
+        "eot": params.get("eot", "smart"),
+        "check": batch.parse_check(params.get("check")),
+        "as_of": datetime.date.today() if as_of is None else batch.parse_date(as_of),
+    }
+
+
+def compute(system, params):
+    # A chart of a single record in the query string
+    if system == "rune":
+        return dump_json(compute_rune())
+    record = {k: params[k] for k in batch.FIELDS if k in params}
+    if "date" not in record:
+        raise HTTPError(http.HTTPStatus.BAD_REQUEST, "No date")
+    try:
+        chart = batch.compute_chart(system, record, get_options(params))
+    except (AssertionError, KeyError, ValueError) as e:
+        message = "%s: %s" % (type(e).__name__, e)
+        raise HTTPError(http.HTTPStatus.BAD_REQUEST, message)
+    return dump_json(chart)
+
+
+def parse_records(body):
+    # A JSON array or NDJSON of records
+    text = body.decode("utf-8")
+    if text.lstrip().startswith("["):
+        return json.loads(text)
+    return [json.loads(line) for line in text.splitlines() if line.strip()]
+
+
+class Server:
+    def __init__(
+        self, executor=None, max_connections=64, metrics=None, timeout=IDLE_TIMEOUT
+    ):
+        self.executor = executor
+        self.semaphore = asyncio.Semaphore(max_connections)
+        self.metrics = Metrics() if metrics is None else metrics
+        self.timeout = timeout
+
+    async def handle(self, reader, writer):
+        async with self.semaphore:
+            try:
+                while await self.handle_request(reader, writer):
+                    pass
+            except (asyncio.IncompleteReadError, ConnectionError):
+                pass
+            finally:
+                writer.close()
+
+    async def handle_request(self, reader, writer):
+        # Whether the connection is kept alive, where an idle connection is
+        # closed, so it does not hold a slot of max_connections
+        try:
+            head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), self.timeout)
+        except asyncio.IncompleteReadError as e:
+            if e.partial:
+                raise
+            return False
+        except asyncio.LimitOverrunError:
+            self.respond(writer, http.HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE)
+            return False
+        except asyncio.TimeoutError:
+            return False
+
+        lines = head.decode("latin-1").split("\r\n")
+        try:
+            method, target, version = lines[0].split(" ", 2)
+        except ValueError:
+            self.respond(writer, http.HTTPStatus.BAD_REQUEST)
+            return False
+        headers = {}
+        for line in lines[1:]:
+            if ":" in line:
+                k, v = line.split(":", 1)
+                headers[k.strip().lower()] = v.strip()
+        keep_alive = headers.get("connection", "").lower() != "close"
+        if version == "HTTP/1.0":
+            keep_alive = headers.get("connection", "").lower() == "keep-alive"
+
+        try:
+            body = await asyncio.wait_for(self.read_body(reader, headers), self.timeout)
+        except asyncio.TimeoutError:
+            return False
+        except HTTPError as e:
+            content = json.dumps({"error": str(e)}, ensure_ascii=False)
+            self.respond(writer, e.status, "application/json", content)
+            return False
+
+        url = urllib.parse.urlsplit(target)
+        params = dict(urllib.parse.parse_qsl(url.query))
+        path = url.path.strip("/")
+        timer = stages.timer("server/")
+        try:
+            content_type, content = await self.dispatch(method, path, params, body)
+            status = http.HTTPStatus.OK
+        except HTTPError as e:
+            content_type = "application/json"
+            content = json.dumps({"error": str(e)}, ensure_ascii=False)
+            status = e.status
+        except Exception:
+            logger.exception("Error in %s %s", method, target)
+            content_type = None
+            content = None
+            status = http.HTTPStatus.INTERNAL_SERVER_ERROR
+        self.respond(writer, status, content_type, content, keep_alive)
+
+        # Other paths are not labeled, so that their number stays small
+        label = path if path in SYSTEMS or path == "metrics" else "other"
+        timer.lap(label)
+        self.metrics.inc("horoscopy_requests_total", system=label, status=int(status))
+        await writer.drain()
+        return keep_alive
+
+    async def read_body(self, reader, headers):
+        # Body of a request by Content-Length or in chunks, where other
+        # transfer encodings are not supported
+        encoding = headers.get("transfer-encoding")
+        if encoding is not None:
+            if encoding.lower() != "chunked":
+                raise HTTPError(http.HTTPStatus.NOT_IMPLEMENTED)
+            if "content-length" in headers:
+                # Ambiguous, as a proxy may read either of them
+                raise HTTPError(http.HTTPStatus.BAD_REQUEST)
+            return await self.read_chunks(reader)
+        try:
+            length = int(headers.get("content-length", 0))
+        except ValueError:
+            length = -1
+        if length < 0:
+            raise HTTPError(http.HTTPStatus.BAD_REQUEST)
+        if length > MAX_BODY_SIZE:
+            raise HTTPError(http.HTTPStatus.REQUEST_ENTITY_TOO_LARGE)
+        if not length:
+            return b""
+        return await reader.readexactly(length)
+
+    async def read_chunks(self, reader):
+        # Each chunk is its size in hex, optionally with extensions, and its
+        # data, followed by trailers, which are ignored, and an empty line
+        body = bytearray()
+        try:
+            while True:
+                line = await reader.readuntil(b"\r\n")
+                try:
+                    size = int(line.split(b";", 1)[0].strip(), 16)
+                except ValueError:
+                    size = -1
+                if size < 0:
+                    raise HTTPError(http.HTTPStatus.BAD_REQUEST)
+                if len(body) + size > MAX_BODY_SIZE:
+                    raise HTTPError(http.HTTPStatus.REQUEST_ENTITY_TOO_LARGE)
+                if size == 0:
+                    break
+                body += await reader.readexactly(size)
+                if await reader.readexactly(2) != b"\r\n":
+                    raise HTTPError(http.HTTPStatus.BAD_REQUEST)
+            while await reader.readuntil(b"\r\n") != b"\r\n":
+                pass
+        except asyncio.LimitOverrunError:
+            raise HTTPError(http.HTTPStatus.BAD_REQUEST) from None
+        return bytes(body)
+
+    async def dispatch(self, method, system, params, body):
+        if system == "metrics" and method == "GET":
+            content = self.metrics.export(stages.get_profile())
+            return "text/plain; version=0.0.4", content
+        if system not in SYSTEMS:
+            raise HTTPError(http.HTTPStatus.NOT_FOUND)
+        if method == "GET":
+            # A chart takes microseconds, so it is computed in the event loop
+            return "application/json", compute(system, params)
+        if method == "POST" and system != "rune":
+            # Records are computed in the executor and returned as NDJSON
+            try:
+                records = parse_records(body)
+                options = get_options(params)
+            except ValueError as e:
+                raise HTTPError(http.HTTPStatus.BAD_REQUEST, str(e))
+            args = (0, records, [system], "json", options)
+            loop = asyncio.get_running_loop()
+            # Stages of worker processes are returned to be added up, while
+            # threads add theirs to the profile directly
+            profile = stages.get_profile()
+            processes = isinstance(
+                self.executor, concurrent.futures.ProcessPoolExecutor
+            )
+            if profile is None or not processes:
+                content = await loop.run_in_executor(
+                    self.executor, batch.format_chunk, *args
+                )
+            else:
+                content, worker_stages = await loop.run_in_executor(
+                    self.executor, batch.profile_chunk, *args
+                )
+                profile.merge(worker_stages)
+            return "application/x-ndjson", content
+        raise HTTPError(http.HTTPStatus.METHOD_NOT_ALLOWED)
+
+    def respond(
+        self, writer, status, content_type=None, content=None, keep_alive=False
+    ):
+        if content is None:
+            content_type = "application/json"
+            content = json.dumps({"error": status.phrase})
+        data = content.encode("utf-8")
+        head = "HTTP/1.1 %d %s\r\n" % (status, status.phrase)
+        head += "Content-Type: %s; charset=utf-8\r\n" % content_type
+        head += "Content-Length: %d\r\n" % len(data)
+        head += "Connection: %s\r\n\r\n" % ("keep-alive" if keep_alive else "close")
+        writer.write(head.encode("latin-1") + data)
+
+
+async def serve(host, port, executor, max_connections, timeout=IDLE_TIMEOUT):
+    # Serve until SIGINT or SIGTERM
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(signum, stop.set)
+        except NotImplementedError:
+            pass
+
+    server = Server(executor, max_connections, timeout=timeout)
+    async with await asyncio.start_server(
+        server.handle, host, port, limit=MAX_HEADER_SIZE
+    ) as listener:
+        for sock in listener.sockets:
+            print("Serving on %s:%d" % sock.getsockname()[:2], flush=True)
+        await stop.wait()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="horoscopy serve", description="Serve charts over HTTP"
+    )
+    parser.add_argument("--host", default="127.0.0.1", type=str, help="Host")
+    parser.add_argument("--port", default=8000, type=int, help="Port")
+    parser.add_argument(
+        "--workers",
+        default=None,
+        type=int,
+        help="Number of processes for POST requests, or 0 for threads",
+    )
+    parser.add_argument(
+        "--max-connections",
+        default=64,
+        type=int,
+        help="Number of connections handled at once",
+    )
+    parser.add_argument(
+        "--idle-timeout",
+        default=IDLE_TIMEOUT,
+        type=float,
+        help="Seconds before an idle connection is closed",
+    )
+    args = parser.parse_args(argv)
+
+    # Resources are loaded at boot, so no request reads files
+    batch.preload(batch.SYSTEMS)
+    compute_rune()
+
+    workers = args.workers
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers == 0:
+        executor = concurrent.futures.ThreadPoolExecutor()
+    else:
+        executor = concurrent.futures.ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=batch.init_worker,
+            initargs=(batch.SYSTEMS,),
+        )
+        # Start the workers before listening, so they do not inherit the socket
+        executor.submit(int).result()
+    try:
+        # Stages are always measured for the metrics
+        with stages.Profile():
+            asyncio.run(
+                serve(
+                    args.host,
+                    args.port,
+                    executor,
+                    args.max_connections,
+                    args.idle_timeout,
+                )
+            )
+    except KeyboardInterrupt:
+        pass
+    finally:
+        executor.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,349 @@
+#
+# Copyright (c) 2022 Kumitaka Izumi
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+import numpy as np
+
+from ..sol2luna import get_sol2luna
+from .eot import get_eot_diff_array
+from .make_chart import res
+from .place import resolve_places
+
+NUM_MIYAS = 12
+
+
+def by_meikyu(chishi):
+    # Indices of 宮 for 地支 in the last axis, with an axis of 命宮 before it
+    miya = (chishi[..., None, :] - np.arange(NUM_MIYAS)[:, None]) % NUM_MIYAS
+    return miya.astype(np.int8)
+
+
+class Tables:
+    def __init__(self):
+        chishi_set, _, chishi2num = res.basic("chishi")
+        tenkan_set, _, tenkan2num = res.basic("tenkan")
+        gogyo_set, _, gogyo2num = res.basic("gogyo")
+        _, _, suuji2num = res.basic("suuji")
+        self.chishi = np.array(chishi_set)
+        self.tenkan = np.array(tenkan_set)
+        self.miya = np.array(res.basic("miya").names)
+        self.kanshi = np.array(
+            [tenkan_set[i % 10] + chishi_set[i % 12] for i in range(60)]
+        )
+
+        def to_chishi(names):
+            return np.array([chishi2num[x] for x in names])
+
+        self.hour2chishi = to_chishi(res.lines("hour2chishi.txt"))
+        self.nenkan2torakan = np.array(
+            [tenkan2num[x] for x in res.lines("nenkan2torakan.txt")]
+        )
+        self.shogen = to_chishi(res.lines("shogen.txt"))
+
+        # 五行 of 五行局 by 命宮 and its 天干, and its number
+        self.gogyokyoku = np.array(
+            [[gogyo2num[x] for x in ary] for ary in res.table("gogyokyoku.txt")]
+        )
+        suuji = res.lines("gogyo2gogyokyoku.txt")
+        self.gogyokyoku_names = np.array(
+            [gogyo + suuji[i] + "局" for i, gogyo in enumerate(gogyo_set)]
+        )
+        self.gogyokyoku_suuji = np.array([suuji2num[x] for x in suuji])
+
+        # 星 in the order of placement, which is also the order in a 宮
+        self.hoshi_names = []
+        self.hoshi_levels = []
+
+        def add_hoshi(names, levels):
+            first = len(self.hoshi_names)
+            self.hoshi_names += list(names)
+            self.hoshi_levels += [int(x) for x in levels]
+            return slice(first, len(self.hoshi_names))
+
+        def add_table(filename):
+            table = res.table("positions/" + filename)
+            columns = [to_chishi(ary[2 : 2 + NUM_MIYAS]) for ary in table]
+            ids = add_hoshi([ary[0] for ary in table], [ary[1] for ary in table])
+            return ids, by_meikyu(np.array(columns).T)
+
+        # 主星 by the position of 紫微星, where 紫微 comes before 天府 and so on
+        shusei = [
+            [x.split("+") if x else [] for x in ary]
+            for ary in res.table("positions/shusei.txt")
+        ]
+        firsts = [x[0] for ary in shusei for x in ary if len(x) == 2]
+        seconds = [x[1] for ary in shusei for x in ary if len(x) == 2]
+        assert not set(firsts) & set(seconds)
+        names = []
+        for name in [y for ary in shusei for x in ary for y in x]:
+            if name not in names:
+                names.append(name)
+        names.sort(key=lambda x: x in seconds)
+        self.shusei = add_hoshi(names, [1] * len(names))
+        chishi = np.zeros((len(shusei), len(names)), dtype=int)
+        for shibi_pos, ary in enumerate(shusei):
+            for i, hoshi_list in enumerate(ary):
+                for name in hoshi_list:
+                    chishi[shibi_pos, names.index(name)] = i
+        self.shusei_miya = by_meikyu(chishi)
+        self.shibisei = np.array(
+            [to_chishi(ary) for ary in res.table("positions/shibisei.txt")]
+        )
+
+        # 星 by 宮 of 命宮 and a 地支 or 天干 column
+        self.gekkeisei, self.gekkeisei_miya = add_table("gekkeisei.txt")
+        self.jikeisei, self.jikeisei_miya = add_table("jikeisei.txt")
+        self.kasei = add_hoshi(["火星", "鈴星"], [0, 0])
+        chishi = [
+            [to_chishi(ary) for ary in res.table("positions/" + filename)]
+            for filename in ["kasei.txt", "reisei.txt"]
+        ]
+        self.kasei_miya = by_meikyu(np.stack(chishi, -1))
+        self.nenkankeisei, self.nenkankeisei_miya = add_table("nenkankeisei.txt")
+        self.nenshikeisei, self.nenshikeisei_miya = add_table("nenshikeisei.txt")
+        self.tensai = add_hoshi(["天才", "天寿"], [-1, -1])
+
+        name2id = {}
+        for i, name in enumerate(self.hoshi_names):
+            name2id.setdefault(name, i)
+
+        # 日系星 relative to another 星
+        table = res.table("positions/nikkeisei.txt")
+        self.nikkeisei = add_hoshi([x[0] for x in table], [x[1] for x in table])
+        self.nikkeisei_anchor = np.array([name2id[x[2]] for x in table])
+        self.nikkeisei_sign = np.array([int(x[3]) for x in table])
+        self.nikkeisei_bias = np.array([int(x[4]) for x in table])
+        self.tensho = add_hoshi(["天傷", "天使"], [-1, -1])
+
+        # 長生十二星 by 五行, direction (1 is clockwise) and 命宮
+        table = res.table("positions/chosei.txt")
+        self.chosei = add_hoshi([x[0] for x in table], [x[1] for x in table])
+        choseishi = to_chishi(res.lines("gogyo2choseishi.txt"))
+        steps = np.array([int(x[2]) for x in table])
+        signs = np.array([-1, 1])
+        chishi = choseishi[:, None, None] + signs[:, None] * steps
+        self.chosei_miya = by_meikyu(chishi)
+
+        table = res.table("positions/hakushi.txt")
+        self.hakushi = add_hoshi([x[0] for x in table], [x[1] for x in table])
+        self.hakushi_anchor = np.array([name2id[x[2]] for x in table])
+        self.hakushi_step = np.array([int(x[3]) for x in table])
+
+        self.shozen, self.shozen_miya = add_table("shozen.txt")
+        self.saizen, self.saizen_miya = add_table("saizen.txt")
+
+        self.hoshi_names = np.array(self.hoshi_names)
+        self.hoshi_levels = np.array(self.hoshi_levels)
+        self.num_hoshi = len(self.hoshi_names)
+        assert self.num_hoshi <= np.iinfo(np.int8).max
+
+        # 星 of each 四化 by 天干
+        table = res.table("positions/shikasei.txt")
+        self.shika_names = np.array([x[0] for x in table])
+        self.shikasei = np.array(
+            [[name2id[x] for x in ary[1:]] for ary in table], dtype=np.int8
+        )
+
+        self.meishu = np.array(res.table("positions/meishu.txt")[0])
+        self.shinshu = np.array(res.table("positions/shinshu.txt")[0])
+
+
+def get_tables():
+    return res.load("batch", Tables)
+
+
+def get_occupancy(positions):
+    # Whether each 星 is in each 宮, which takes 12 bytes per 星 and chart
+    return positions[:, None, :] == np.arange(NUM_MIYAS)[:, None]
+
+
+def place_stars(kanshi, luna_month, luna_day, hour_chishi, is_male):
+    # Batch version of get_layout(), where kanshi and hour_chishi are numbers
+    # and 星 are in "positions" as the indices of their 宮
+    tables = get_tables()
+    kanshi = np.asarray(kanshi)
+    month = np.asarray(luna_month)
+    day = np.asarray(luna_day)
+    hour = np.asarray(hour_chishi)
+    is_male = np.asarray(is_male, dtype=bool)
+    num_charts = len(kanshi)
+    rows = np.arange(num_charts)[:, None]
+    miya_ids = np.arange(NUM_MIYAS)
+
+    # 命宮 and 身宮 as 地支, where 寅 is 2
+    meikyu = (month + 1 - hour) % NUM_MIYAS
+    shinkyu = (month + 1 + hour - meikyu) % NUM_MIYAS
+    miya_chishi = (miya_ids + meikyu[:, None]) % NUM_MIYAS
+
+    year_tenkan = kanshi % 10
+    year_chishi = kanshi % 12
+    clockwise = (year_tenkan % 2 == 0) == is_male
+    sign = np.where(clockwise, 1, -1)
+
+    # 天干 of each 宮 from the one at 寅
+    tora = (2 - meikyu) % NUM_MIYAS
+    tenkan_at_tora = tables.nenkan2torakan[year_tenkan]
+    miya_tenkan = (tenkan_at_tora[:, None] + (miya_ids - tora[:, None]) % 12) % 10
+
+    # 来因宮 is the first 宮 of the year 天干 other than 子 and 丑
+    is_raiinkyu = (miya_tenkan == year_tenkan[:, None]) & (miya_chishi >= 2)
+    raiinkyu = np.where(is_raiinkyu.any(1), is_raiinkyu.argmax(1), -1)
+
+    gogyo = tables.gogyokyoku[meikyu, miya_tenkan[:, 0]]
+    shibi_pos = tables.shibisei[day - 1, gogyo]
+
+    positions = np.empty((num_charts, tables.num_hoshi), dtype=np.int8)
+    positions[:, tables.shusei] = tables.shusei_miya[shibi_pos, meikyu]
+    positions[:, tables.gekkeisei] = tables.gekkeisei_miya[month - 1, meikyu]
+    positions[:, tables.jikeisei] = tables.jikeisei_miya[hour, meikyu]
+    positions[:, tables.kasei] = tables.kasei_miya[year_chishi, hour, meikyu]
+    miya = tables.nenkankeisei_miya[year_tenkan, meikyu]
+    positions[:, tables.nenkankeisei] = miya
+    miya = tables.nenshikeisei_miya[year_chishi, meikyu]
+    positions[:, tables.nenshikeisei] = miya
+
+    # 天才 is at the 宮 numbered by the year 地支, and 天寿 is as far from 身宮
+    tensai = np.stack([year_chishi, shinkyu + year_chishi], -1) % NUM_MIYAS
+    positions[:, tables.tensai] = tensai
+
+    anchor = positions[:, tables.nikkeisei_anchor]
+    steps = tables.nikkeisei_sign * (day[:, None] - 1 + tables.nikkeisei_bias)
+    positions[:, tables.nikkeisei] = (anchor + steps) % NUM_MIYAS
+
+    # 天傷 at 奴僕宮 and 天使 at 疾厄宮
+    positions[:, tables.tensho] = [5, 7]
+
+    positions[:, tables.chosei] = tables.chosei_miya[gogyo, clockwise * 1, meikyu]
+    anchor = positions[:, tables.hakushi_anchor]
+    steps = sign[:, None] * tables.hakushi_step
+    positions[:, tables.hakushi] = (anchor + steps) % NUM_MIYAS
+    positions[:, tables.shozen] = tables.shozen_miya[year_chishi, meikyu]
+    positions[:, tables.saizen] = tables.saizen_miya[year_chishi, meikyu]
+
+    # 生年四化 by the year 天干, and 流出四化 and 自化四化 by the 天干 of each
+    # 宮 as (chart, 四化, 宮), where -1 is none
+    hoshi = tables.shikasei[:, miya_tenkan].transpose(1, 0, 2)
+    miya = positions[rows[:, :, None], hoshi]
+    opposite = (miya_ids + NUM_MIYAS // 2) % NUM_MIYAS
+
+    # 大限 from 命宮 in the direction by 陰陽 and gender
+    suuji = tables.gogyokyoku_suuji[gogyo]
+    order = np.where(clockwise[:, None], miya_ids, -miya_ids % NUM_MIYAS)
+    taigen_begin = np.empty((num_charts, NUM_MIYAS), dtype=int)
+    taigen_begin[rows, order] = suuji[:, None] + 10 * miya_ids
+
+    return {
+        "positions": positions,
+        "shika_meikyu": tables.shikasei[:, year_tenkan].T,
+        "shika_ryushutsu": np.where(miya == opposite, hoshi, -1),
+        "shika_jika": np.where(miya == miya_ids, hoshi, -1),
+        "miya_chishi": miya_chishi,
+        "miya_tenkan": miya_tenkan,
+        "shinkyu": shinkyu,
+        "raiinkyu": raiinkyu,
+        "taigen_begin": taigen_begin,
+        "gogyokyoku": tables.gogyokyoku_names[gogyo],
+        "meishu": tables.meishu[meikyu],
+        "shinshu": tables.shinshu[year_chishi],
+        "nedoshitokun": tables.chishi[(hour + 1 - month) % NUM_MIYAS],
+    }
+
+
+def project(luna_year, is_male, taigen_begin, as_of):
+    # Batch version of make_chart.project(), where taigen is the index of its
+    # 宮, or -1 if the age is out of every 大限
+    tables = get_tables()
+    luna_year = np.asarray(luna_year)
+    old = as_of.year - luna_year + 1
+
+    # Compute 小限
+    diff = np.where(is_male, old - 1, 1 - old)
+    shogen = (tables.shogen[(luna_year - 1924) % 12] + diff) % NUM_MIYAS
+
+    # Find 大限 of the old
+    old_column = old[:, None]
+    in_taigen = (taigen_begin <= old_column) & (old_column <= taigen_begin + 9)
+    taigen = np.where(in_taigen.any(1), in_taigen.argmax(1), -1)
+    return {"old": old, "shogen": tables.chishi[shogen], "taigen": taigen}
+
+
+def make_charts(dates, times, genders, places=None, eot="smart", *, as_of):
+    # Batch version of compute_shibi(), where places are names or east
+    # longitudes, and None, "" and NaN are no place
+    tables = get_tables()
+
+    dates = np.asarray(dates, dtype="datetime64[D]")
+    times = np.asarray(times, dtype="timedelta64[m]")
+    genders = np.asarray(genders, dtype="U1")
+    is_male = np.isin(genders, ["m", "M"])
+    if not (is_male | np.isin(genders, ["f", "F"])).all():
+        raise ValueError("Unknown gender")
+
+    # Corrections are added in microseconds like datetime.timedelta
+    date = dates.astype("datetime64[us]") + times
+    if places is None:
+        longitudes = np.full(dates.shape, np.nan)
+    elif np.asarray(places).dtype.kind in "iuf":
+        longitudes = np.asarray(places, dtype=float)
+    else:
+        longitudes = resolve_places(places)
+    place_diff = (longitudes - 135) * 4
+    diff = np.round(np.where(np.isnan(place_diff), 0, place_diff) * 60e6)
+    date += diff.astype("timedelta64[us]")
+
+    # Take into account 均時差
+    eot_diff = get_eot_diff_array(dates, eot)
+    if eot_diff is not None:
+        date += np.round(eot_diff * 60e6).astype("timedelta64[us]")
+    else:
+        eot_diff = np.full(dates.shape, np.nan)
+
+    hour = (date - date.astype("datetime64[D]")).astype("timedelta64[h]").astype(int)
+
+    # This is the next day
+    date += np.where(hour == 23, np.timedelta64(1, "D"), np.timedelta64(0, "D"))
+    day = date.astype("datetime64[D]")
+
+    # Convert 新暦 to 旧暦
+    columns = get_sol2luna().lookup_array("shibi", day)
+    year = day.astype("datetime64[Y]").astype(int) + 1970
+    luna_year = year + columns["bias"]
+    luna_month = columns["month"]
+    luna_day = columns["day"]
+
+    kanshi = (luna_year - 1924) % 60
+    hour_chishi = tables.hour2chishi[hour]
+    charts = place_stars(kanshi, luna_month, luna_day, hour_chishi, is_male)
+    charts.update(project(luna_year, is_male, charts["taigen_begin"], as_of))
+    charts.update(
+        {
+            "place_diff": place_diff,
+            "longitude": longitudes,
+            "eot_diff": eot_diff,
+            "date": date,
+            "luna_year": luna_year,
+            "luna_month": luna_month,
+            "luna_day": luna_day,
+            "hour_chishi": tables.chishi[hour_chishi],
+            "kanshi": tables.kanshi[kanshi],
+        }
+    )
+    return charts
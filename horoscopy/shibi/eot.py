@@ -0,0 +1,179 @@
+#
+# Copyright (c) 2022 Kumitaka Izumi
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+
+import calendar
+import functools
+import math
+
+from ..registry import get_registry
+
+res = get_registry(__package__)
+
+METHODS = ["zero", "smart", "cie", "table"]
+
+# Number of dates kept by smart(), which depends on the year as well
+SMART_CACHE_SIZE = 4096
+
+# Julian Date of 1900/01/01
+J2 = 2415020.5
+
+
+def calc_jd(y, m, d):
+    # Calculate Julian Date
+    if m <= 2:
+        y -= 1
+        m += 12
+    jd = (
+        int(365.25 * y) + (y // 400) - (y // 100) + int(30.59 * (m - 2)) + d + 1721088.5
+    )
+    return jd
+
+
+@functools.lru_cache(maxsize=SMART_CACHE_SIZE)
+def smart(date):
+    # https://www.astrogreg.com/snippets/equationoftime-simple.html
+    J1 = calc_jd(date.year, date.month, date.day)
+    T1 = (J1 - J2) / 36525
+    T2 = T1 * T1
+    T3 = T2 * T1
+    rad = math.pi / 180
+    eps = (23.452294 - 0.0130125 * T1 - 0.00000164 * T2 + 0.000000503 * T3) * rad
+    y = math.tan(eps / 2) ** 2
+    p = 2 * math.pi
+    L = (279.69668 + 36000.76892 * T1 + 0.0003025 * T2) * rad % p
+    e = 0.01675104 - 0.0000418 * T1 - 0.000000126 * T2
+    M = (358.47583 + 35999.04975 * T1 - 0.000150 * T2 - 0.0000033 * T3) * rad % p
+    E = (
+        y * math.sin(2 * L)
+        - 2 * e * math.sin(M)
+        + 4 * e * y * math.sin(M) * math.cos(2 * L)
+        - 0.5 * y * y * math.sin(4 * L)
+        - 1.25 * e * e * math.sin(2 * M)
+    )
+    return -E / rad / 15 * 60
+
+
+def cie(yday, num_days):
+    # http://sigbox.web.fc2.com/calc/calc2.html
+    w = 2 * math.pi / num_days
+    J = yday + 0.5
+    wJ = w * J
+    theta = (
+        0.0072 * math.cos(1 * wJ)
+        - 0.0528 * math.cos(2 * wJ)
+        - 0.0012 * math.cos(3 * wJ)
+        - 0.1229 * math.sin(1 * wJ)
+        - 0.1565 * math.sin(2 * wJ)
+        - 0.0041 * math.sin(3 * wJ)
+    )
+    return -60 * theta
+
+
+def get_days(method, is_leap):
+    # 均時差 by the day of the year from 0, for cie and table, which do not
+    # depend on the year otherwise
+    def loader():
+        num_days = 366 if is_leap else 365
+        if method == "cie":
+            return tuple(cie(i, num_days) for i in range(num_days))
+
+        days = []
+        for month in range(1, 13):
+            equation = res.lines("equation/%02d.txt" % month)
+            if month == 2 and not is_leap:
+                equation = equation[:28]
+            days += [-int(x) for x in equation]
+        assert len(days) == num_days
+        return tuple(days)
+
+    return res.load(("eot", method, is_leap), loader)
+
+
+def get_eot_diff(date, method):
+    # 均時差 in minutes, or None if it is not taken into account
+    if method is None or method == "zero":
+        return None
+    if method == "smart":
+        return smart(date)
+    if method in ("cie", "table"):
+        days = get_days(method, calendar.isleap(date.year))
+        return days[date.timetuple().tm_yday - 1]
+    raise ValueError("Unknown EOT type")
+
+
+def get_eot_diff_array(dates, method):
+    # Same as get_eot_diff() for an array of datetime64, or None
+    import numpy as np
+
+    if method is None or method == "zero":
+        return None
+    if method not in METHODS:
+        raise ValueError("Unknown EOT type")
+
+    dates = np.asarray(dates, dtype="datetime64[D]")
+    years = dates.astype("datetime64[Y]")
+    yday = (dates - years).astype(np.int64)
+    year = years.astype(np.int64) + 1970
+
+    if method in ("cie", "table"):
+        is_leap = (year % 4 == 0) & ((year % 100 != 0) | (year % 400 == 0))
+        days = np.array([get_days(method, False) + (0.0,), get_days(method, True)])
+        return days[is_leap.astype(np.int64), yday].astype(float)
+
+    # Each date is computed once, since a batch has many records on a day. The
+    # ufuncs of NumPy may differ from math in the last bit, which is far below
+    # the microseconds the difference is rounded to
+    dates, inverse = np.unique(dates, return_inverse=True)
+    years = dates.astype("datetime64[Y]")
+    year = years.astype(np.int64) + 1970
+    month = (dates.astype("datetime64[M]") - years).astype(np.int64) + 1
+    day = (dates - dates.astype("datetime64[M]")).astype(np.int64) + 1
+
+    y = np.where(month <= 2, year - 1, year)
+    m = np.where(month <= 2, month + 12, month)
+    J1 = (
+        np.floor(365.25 * y).astype(np.int64)
+        + (y // 400)
+        - (y // 100)
+        + np.floor(30.59 * (m - 2)).astype(np.int64)
+        + day
+        + 1721088.5
+    )
+    T1 = (J1 - J2) / 36525
+    T2 = T1 * T1
+    T3 = T2 * T1
+    rad = math.pi / 180
+    eps = (23.452294 - 0.0130125 * T1 - 0.00000164 * T2 + 0.000000503 * T3) * rad
+    y = np.tan(eps / 2) ** 2
+    p = 2 * math.pi
+    L = (279.69668 + 36000.76892 * T1 + 0.0003025 * T2) * rad % p
+    e = 0.01675104 - 0.0000418 * T1 - 0.000000126 * T2
+    M = (358.47583 + 35999.04975 * T1 - 0.000150 * T2 - 0.0000033 * T3) * rad % p
+    E = (
+        y * np.sin(2 * L)
+        - 2 * e * np.sin(M)
+        + 4 * e * y * np.sin(M) * np.cos(2 * L)
+        - 0.5 * y * y * np.sin(4 * L)
+        - 1.25 * e * e * np.sin(2 * M)
+    )
+    return (-E / rad / 15 * 60)[inverse]
@@ -0,0 +1,341 @@
+#
+# Copyright (c) 2022 Kumitaka Izumi
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+
+import argparse
+import datetime
+import functools
+import io
+import json
+import os
+import sys
+
+from .. import stages
+from ..batch import parse_date, parse_time, read_records
+from ..output import FORMATS, Writer, dump_json, to_data
+from .eot import METHODS
+from .make_chart import (
+    LAYOUT_CACHE_SIZE,
+    add_chishi,
+    add_tenkan,
+    compute_natal,
+    get_rokuju_kanshi,
+    project,
+    res,
+)
+
+# Number of years of a lifetime
+NUM_YEARS = 100
+
+
+class FlowShika:
+    def __init__(self, name, hoshi, miya):
+        self.name = name
+        self.hoshi = hoshi
+        # Index of 宮 of the natal chart where 星 is
+        self.miya = miya
+
+
+class MonthFlow:
+    def __init__(self, month):
+        self.month = month
+        self.kanshi = ""
+        # Index of 宮 of 流月命宮
+        self.miya = 0
+        self.shika_list = []
+
+
+class YearFlow:
+    def __init__(self, year):
+        self.year = year
+        self.kanshi = ""
+        self.old = 0
+        # Index of 宮 of 流年命宮
+        self.miya = 0
+        self.taigen = None
+        self.shogen = ""
+        self.shika_list = []
+        self.month_list = []
+
+
+@functools.lru_cache(maxsize=LAYOUT_CACHE_SIZE)
+def get_shika_table(layout):
+    # 四化 for each 天干 located on a layout and their JSON, so a flow only
+    # looks them up
+    tenkan_set = res.basic("tenkan").names
+    table = []
+    for k in range(len(tenkan_set)):
+        shika_list = []
+        for ary in res.table("positions/shikasei.txt"):
+            i, hoshi = layout.get_hoshi(ary[k + 1])
+            assert i != -1
+            shika_list.append(FlowShika(ary[0], hoshi.name, i))
+        text = json.dumps(to_data(shika_list), ensure_ascii=False)
+        table.append((tuple(shika_list), text))
+    return tuple(table)
+
+
+def dump_head(obj, keys, shika_table):
+    # JSON of a flow up to its 四化, which are spliced as they were serialized
+    _, _, tenkan2num = res.basic("tenkan")
+    head = json.dumps({k: getattr(obj, k) for k in keys}, ensure_ascii=False)
+    return head[:-1] + ', "shika_list": ' + shika_table[tenkan2num[obj.kanshi[0]]][1]
+
+
+@functools.lru_cache(maxsize=60)
+def get_month_flows(layout, kanshi):
+    # 流月 of a year and their JSON, which recur every 60 years of a chart
+    _, _, chishi2num = res.basic("chishi")
+    _, _, tenkan2num = res.basic("tenkan")
+    chishi2miya = {miya.chishi: i for i, miya in enumerate(layout.miyas)}
+    shika_table = get_shika_table(layout)
+
+    # 正月 of the year is on 斗君, which is 子年斗君 moved by 年支
+    tokun = add_chishi(layout.nedoshitokun, chishi2num[kanshi[1]])
+    tenkan_at_tora = res.lines("nenkan2torakan.txt")[tenkan2num[kanshi[0]]]
+    month_list = []
+    for i in range(12):
+        month = MonthFlow(i + 1)
+        tenkan = add_tenkan(tenkan_at_tora, i)
+        month.kanshi = tenkan + add_chishi("寅", i)
+        month.miya = chishi2miya[add_chishi(tokun, i)]
+        month.shika_list = shika_table[tenkan2num[tenkan]][0]
+        month_list.append(month)
+    texts = [
+        dump_head(x, ["month", "kanshi", "miya"], shika_table) + "}" for x in month_list
+    ]
+    return tuple(month_list), "[" + ", ".join(texts) + "]"
+
+
+def iterate_flows(natal, begin=None, num_years=NUM_YEARS, months=False):
+    # 流年 (and 流月) of a natal chart from the year of begin, which is the
+    # year of birth by default, yielded one year at a time; the 四化 and 流月
+    # are shared between years and must not be modified
+    timer = stages.timer("shibi/")
+    layout = natal.layout
+    if begin is None:
+        begin = natal.luna_year
+    _, _, tenkan2num = res.basic("tenkan")
+    chishi2miya = {miya.chishi: i for i, miya in enumerate(layout.miyas)}
+    rokuju_kanshi_set = get_rokuju_kanshi()
+    shika_table = get_shika_table(layout)
+    timer.lap("flow")
+
+    for year in range(begin, begin + num_years):
+        # Not counting the time the caller takes between years
+        timer = stages.timer("shibi/")
+        flow = YearFlow(year)
+        kanshi = rokuju_kanshi_set[(year - 1924) % len(rokuju_kanshi_set)]
+        flow.kanshi = kanshi
+        flow.miya = chishi2miya[kanshi[1]]
+        flow.shika_list = shika_table[tenkan2num[kanshi[0]]][0]
+
+        projection = project(natal, datetime.date(year, 1, 1))
+        flow.old = projection.old
+        flow.taigen = projection.taigen
+        flow.shogen = projection.shogen
+
+        if months:
+            flow.month_list = get_month_flows(layout, kanshi)[0]
+        timer.lap("flow")
+        yield flow
+
+
+def dump_flow(flow, layout):
+    # Same as dump_json()
+    timer = stages.timer("output/")
+    keys = ["year", "kanshi", "old", "miya", "taigen", "shogen"]
+    line = dump_head(flow, keys, get_shika_table(layout))
+    if flow.month_list:
+        line += ', "month_list": %s}' % get_month_flows(layout, flow.kanshi)[1]
+    else:
+        line += ', "month_list": []}'
+    timer.lap("json")
+    return line
+
+
+def format_shika_list(shika_list, miyas):
+    return "　".join(
+        "%s：%s（%s）" % (x.name, x.hoshi, miyas[x.miya].name) for x in shika_list
+    )
+
+
+def format_flow(flow, natal):
+    miyas = natal.layout.miyas
+    lines = []
+    line = "・%04d %s　%d歳　流年命宮：%s" % (
+        flow.year,
+        flow.kanshi,
+        flow.old,
+        miyas[flow.miya].name,
+    )
+    if flow.taigen is not None:
+        line += "　大限：" + miyas[flow.taigen].name
+    line += "　小限：" + flow.shogen
+    lines.append(line)
+    lines.append("　" + format_shika_list(flow.shika_list, miyas))
+    for month in flow.month_list:
+        lines.append(
+            "　%02d月 %s　流月命宮：%s　%s"
+            % (
+                month.month,
+                month.kanshi,
+                miyas[month.miya].name,
+                format_shika_list(month.shika_list, miyas),
+            )
+        )
+    return "".join([line + "\n" for line in lines])
+
+
+def write_flows(writer, natal, output_format, index=None, **kwargs):
+    # Each year is written once computed, as a line of NDJSON or text
+    for flow in iterate_flows(natal, **kwargs):
+        if output_format != "json":
+            writer.write(format_flow(flow, natal))
+        elif index is None:
+            writer.write(dump_flow(flow, natal.layout) + "\n")
+        else:
+            text = dump_flow(flow, natal.layout)
+            writer.write('{"index": %d, "flow": %s}\n' % (index, text))
+
+
+def write_records(writer, records, output_format, eot, **kwargs):
+    # Errors are reported per record as the batch command does
+    for index, record in enumerate(records):
+        try:
+            date = parse_date(record["date"])
+            time = parse_time(record.get("time"))
+            if time is None:
+                raise ValueError("No time")
+            place = (record.get("place") or "").strip() or None
+            natal = compute_natal(date, time, record.get("gender") or "", place, eot)
+        except Exception as e:
+            error = "%s: %s" % (type(e).__name__, e)
+            if output_format == "json":
+                writer.write('{"index": %d, "error": %s}\n' % (index, dump_json(error)))
+            else:
+                writer.write("[%d] %s\n\n" % (index, error))
+            continue
+        if output_format != "json":
+            writer.write("[%d] flow\n" % index)
+        write_flows(writer, natal, output_format, index, **kwargs)
+        if output_format != "json":
+            writer.write("\n")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m horoscopy.shibi.flow",
+        description="Make 流年 and 流月 of a chart or of birth records",
+    )
+    parser.add_argument(
+        "--input",
+        default=None,
+        type=str,
+        help="CSV or NDJSON file of records, or - for stdin, instead of a date",
+    )
+    parser.add_argument(
+        "--input-format",
+        choices=["csv", "ndjson"],
+        default=None,
+        type=str,
+        help="Format of the input, which is guessed from its extension by default",
+    )
+    parser.add_argument("--date", default=None, type=str, help="Date, e.g., 2000.01.01")
+    parser.add_argument("--time", default=None, type=str, help="Time, e.g., 21:00")
+    parser.add_argument(
+        "--gender", default=None, type=str, help="Gender, M(ale) or F(emale)"
+    )
+    parser.add_argument(
+        "--place", default=None, type=str, help="Place or east longitude"
+    )
+    parser.add_argument(
+        "--eot",
+        choices=METHODS,
+        default="smart",
+        type=str,
+        help="Method to compute equation of time",
+    )
+    parser.add_argument(
+        "--begin",
+        default=None,
+        type=int,
+        help="First year, which is the year of birth by default",
+    )
+    parser.add_argument("--years", default=NUM_YEARS, type=int, help="Number of years")
+    parser.add_argument("--months", action="store_true", help="Add 流月")
+    parser.add_argument(
+        "--format",
+        choices=FORMATS,
+        default="json",
+        type=str,
+        help="Output format, where json is NDJSON",
+    )
+    parser.add_argument("--output", default=None, type=str, help="Output file")
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        const="-",
+        default=None,
+        type=str,
+        help="Print the time of each stage, or write it to a JSON file",
+    )
+    args = parser.parse_args(argv)
+    if args.input is None and None in (args.date, args.time, args.gender):
+        parser.error("--date, --time and --gender are required without --input")
+
+    kwargs = {"begin": args.begin, "num_years": args.years, "months": args.months}
+    output = None if args.output is None else open(args.output, "w", encoding="utf-8")
+    try:
+        with stages.profiling(args.profile), Writer(output) as writer:
+            if args.input is None:
+                natal = compute_natal(
+                    parse_date(args.date),
+                    parse_time(args.time),
+                    args.gender,
+                    args.place,
+                    args.eot,
+                )
+                write_flows(writer, natal, args.format, **kwargs)
+                return
+            if args.input == "-":
+                stream = io.TextIOWrapper(
+                    sys.stdin.buffer, encoding="utf-8", newline=""
+                )
+            else:
+                stream = open(args.input, encoding="utf-8", newline="")
+            input_format = args.input_format
+            if input_format is None:
+                ext = os.path.splitext(args.input)[1].lower()
+                input_format = (
+                    "ndjson" if ext in (".ndjson", ".jsonl", ".json") else "csv"
+                )
+            with stream:
+                records = read_records(stream, input_format)
+                write_records(writer, records, args.format, args.eot, **kwargs)
+    finally:
+        if output is not None:
+            output.close()
+
+
+if __name__ == "__main__":
+    main()
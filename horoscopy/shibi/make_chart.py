@@ -0,0 +1,719 @@
+#!/usr/bin/env python
+#
+# Copyright (c) 2022 Kumitaka Izumi
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+import argparse
+import datetime
+import functools
+import sys
+
+from .. import stages
+from ..output import FORMATS, Writer, dump_json
+from ..registry import get_registry
+from ..sol2luna import get_calendar
+from .eot import METHODS, get_eot_diff
+from .place import resolve_place
+
+res = get_registry(__package__)
+
+# Number of layouts kept by get_layout(), each of which takes about 20 KB
+LAYOUT_CACHE_SIZE = 1024
+
+
+class Shika:
+    def __init__(self, name, kind):
+        assert name is not None and name
+        self.name = name
+        self.kind = kind
+
+
+class Hoshi:
+    def __init__(self, name, level):
+        assert name is not None and name
+        self.name = name
+        self.level = int(level)
+        self.shikasei_list = []
+
+
+class Miya:
+    def __init__(self, name):
+        assert name is not None and name
+        self.name = name
+        self.chishi = ""
+        self.tenkan = ""
+        self.hoshi_list = []
+        self.is_shinkyu = False
+        self.is_raiinkyu = False
+        self.taigen_begin = 0
+        self.taigen_end = 0
+
+
+class Chart:
+    def __init__(self):
+        self.now = None
+        self.place_diff = None
+        self.longitude = None
+        self.eot_diff = None
+        self.old = 0
+        self.date = None
+        self.luna_year = 0
+        self.luna_month = 0
+        self.luna_day = 0
+        self.hour_chishi = ""
+        self.kanshi = ""
+        self.gogyokyoku = ""
+        self.meishu = ""
+        self.shinshu = ""
+        self.nedoshitokun = ""
+        self.shogen = ""
+        self.miyas = []
+        self.hoshi2miya = {}
+        # Index of 宮 of the current 大限, or None before the first one
+        self.taigen = None
+
+
+class Natal:
+    # Parts of a chart fixed at birth, which are shared by every date the
+    # chart is read on and must not be modified
+    def __init__(self):
+        self.place_diff = None
+        self.longitude = None
+        self.eot_diff = None
+        self.date = None
+        self.is_male = True
+        self.luna_year = 0
+        self.luna_month = 0
+        self.luna_day = 0
+        self.hour_chishi = ""
+        self.layout = None
+
+
+class Projection:
+    # Parts of a chart which depend on the date it is read on
+    def __init__(self, as_of):
+        self.as_of = as_of
+        self.old = 0
+        self.shogen = ""
+        self.taigen = None
+
+
+class Layout:
+    def __init__(self):
+        self.kanshi = ""
+        self.gogyokyoku = ""
+        self.meishu = ""
+        self.shinshu = ""
+        self.nedoshitokun = ""
+        self.miyas = []
+        # Name of 星 to (index of 宮, index in its hoshi_list)
+        self.hoshi2miya = {}
+
+    def add_hoshi(self, i, hoshi):
+        # The first one is kept for the same names, e.g., 官符 of 将前 and 歳前
+        miya = self.miyas[i]
+        self.hoshi2miya.setdefault(hoshi.name, (i, len(miya.hoshi_list)))
+        miya.hoshi_list.append(hoshi)
+
+    def get_hoshi(self, name):
+        # (index of 宮, 星), or (-1, None) if it is not placed
+        if name not in self.hoshi2miya:
+            return -1, None
+        i, j = self.hoshi2miya[name]
+        return i, self.miyas[i].hoshi_list[j]
+
+
+def add_chishi(chishi, val):
+    _, num2chishi, chishi2num = res.basic("chishi")
+    n = chishi2num[chishi] + int(val)
+    size = len(chishi2num)
+    n %= size
+    if n <= -1:
+        n += size
+    return num2chishi[n]
+
+
+def add_tenkan(tenkan, val):
+    _, num2tenkan, tenkan2num = res.basic("tenkan")
+    n = tenkan2num[tenkan] + int(val)
+    size = len(tenkan2num)
+    if n >= size:
+        n -= size
+    elif n <= -1:
+        n += size
+    return num2tenkan[n]
+
+
+def get_rokuju_kanshi():
+    def loader():
+        tenkan_set = res.basic("tenkan").names
+        chishi_set = res.basic("chishi").names
+
+        # Make 六十干支
+        rokuju_kanshi_set = []
+        idx = 0
+        for _ in range(6):
+            for i in tenkan_set:
+                j = chishi_set[idx]
+                rokuju_kanshi_set.append(i + j)
+                idx += 1
+                if idx == len(chishi_set):
+                    idx = 0
+        return tuple(rokuju_kanshi_set)
+
+    return res.load("rokuju_kanshi", loader)
+
+
+def compute_natal(date, time, gender, place=None, eot="smart"):
+    timer = stages.timer("shibi/")
+    natal = Natal()
+    sol_year, sol_month, sol_day = date.year, date.month, date.day
+    date = datetime.datetime(sol_year, sol_month, sol_day, time.hour, time.minute)
+
+    if gender.startswith(("m", "M")):
+        natal.is_male = True
+    elif gender.startswith(("f", "F")):
+        natal.is_male = False
+    else:
+        raise ValueError("Unknown gender")
+
+    # Take into account 地方時差
+    if place is not None:
+        longitude, diff = resolve_place(place)
+        date += datetime.timedelta(minutes=diff)
+        natal.place_diff = diff
+        natal.longitude = longitude
+
+    # Take into account 均時差
+    diff = get_eot_diff(datetime.date(sol_year, sol_month, sol_day), eot)
+    if diff is not None:
+        date += datetime.timedelta(minutes=diff)
+        natal.eot_diff = diff
+
+    # This is the next day
+    if date.hour == 23:
+        date += datetime.timedelta(days=1)
+    natal.date = date
+    timer.lap("time")
+
+    # Convert 新暦 to 旧暦
+    bias, luna_month, luna_day = get_calendar("shibi").lookup(date.date())
+    luna_year = date.year + bias
+    natal.luna_year = luna_year
+    natal.luna_month = luna_month
+    natal.luna_day = luna_day
+    timer.lap("sol2luna")
+
+    # Convert hour to 地支
+    hour_chishi = res.lines("hour2chishi.txt")[date.hour]
+    natal.hour_chishi = hour_chishi
+
+    # 甲子 is 六十干支 on 1924
+    rokuju_kanshi_set = get_rokuju_kanshi()
+    kanshi = rokuju_kanshi_set[(luna_year - 1924) % len(rokuju_kanshi_set)]
+    timer.lap("kanshi")
+
+    # Including the stages of get_layout() unless the layout is cached
+    natal.layout = get_layout(kanshi, luna_month, luna_day, hour_chishi, natal.is_male)
+    timer.lap("layout")
+    return natal
+
+
+def project(natal, as_of):
+    timer = stages.timer("shibi/")
+    projection = Projection(as_of)
+
+    # Compute current old
+    old = as_of.year - natal.luna_year + 1
+    projection.old = old
+
+    # Compute 小限
+    _, _, chishi2num = res.basic("chishi")
+    base_chishi = res.lines("shogen.txt")[chishi2num[natal.layout.kanshi[1]]]
+    diff = old - 1 if natal.is_male else 1 - old
+    projection.shogen = add_chishi(base_chishi, diff)
+
+    # Find 大限 of the old
+    for i, miya in enumerate(natal.layout.miyas):
+        if miya.taigen_begin <= old <= miya.taigen_end:
+            projection.taigen = i
+            break
+    timer.lap("projection")
+    return projection
+
+
+def make_chart(natal, projection):
+    chart = Chart()
+    chart.now = projection.as_of
+    chart.place_diff = natal.place_diff
+    chart.longitude = natal.longitude
+    chart.eot_diff = natal.eot_diff
+    chart.old = projection.old
+    chart.date = natal.date
+    chart.luna_year = natal.luna_year
+    chart.luna_month = natal.luna_month
+    chart.luna_day = natal.luna_day
+    chart.hour_chishi = natal.hour_chishi
+
+    layout = natal.layout
+    chart.kanshi = layout.kanshi
+    chart.gogyokyoku = layout.gogyokyoku
+    chart.meishu = layout.meishu
+    chart.shinshu = layout.shinshu
+    chart.nedoshitokun = layout.nedoshitokun
+    chart.shogen = projection.shogen
+    chart.miyas = layout.miyas
+    chart.hoshi2miya = layout.hoshi2miya
+    chart.taigen = projection.taigen
+    return chart
+
+
+def compute_shibi(date, time, gender, place=None, eot="smart", *, as_of):
+    # The age is counted on as_of, which the caller gives, e.g., today
+    natal = compute_natal(date, time, gender, place, eot)
+    return make_chart(natal, project(natal, as_of))
+
+
+@functools.lru_cache(maxsize=LAYOUT_CACHE_SIZE)
+def get_layout(kanshi, luna_month, luna_day, hour_chishi, is_male):
+    # The 十二宮 and their stars are determined by these values only, so charts
+    # with the same ones share a Layout, which must not be modified
+    timer = stages.timer("shibi/")
+    layout = Layout()
+    is_female = not is_male
+
+    chishi_set, _, chishi2num = res.basic("chishi")
+
+    # Compute positions of 命宮 and 身宮
+    col_diff = luna_month - 1
+    chishi = add_chishi("寅", col_diff)
+    row_diff = chishi2num[hour_chishi]
+    meikyu_chishi = add_chishi(chishi, -row_diff)
+    shinkyu_chishi = add_chishi(chishi, row_diff)
+
+    # Make 十二宮 (0 is 命宮, 1 is 父母宮, and so on)
+    miya_set, _, _ = res.basic("miya")
+    miyas = []
+    for miya_name in miya_set:
+        miyas.append(Miya(miya_name))
+    layout.miyas = miyas
+
+    # Obtain 地支 for each 宮
+    bias = chishi2num[meikyu_chishi]
+    chishi2miya = {}
+    for i, miya_name in enumerate(miya_set):
+        chishi = add_chishi(chishi_set[i], bias)
+        miyas[i].chishi = chishi
+        chishi2miya[chishi] = i
+        if chishi == shinkyu_chishi:
+            miyas[i].is_shinkyu = True
+
+    # Get set of 天干
+    _, _, tenkan2num = res.basic("tenkan")
+    year_tenkan = kanshi[0]
+    year_chishi = kanshi[1]
+    layout.kanshi = kanshi
+
+    is_yokan = tenkan2num[year_tenkan] % 2 == 0
+    is_inkan = not is_yokan
+    clockwise = (is_yokan and is_male) or (is_inkan and is_female)
+
+    tenkan_at_tora = res.lines("nenkan2torakan.txt")[tenkan2num[year_tenkan]]
+
+    # Obtain 天干 for each 宮
+    idx = chishi2miya["寅"]
+    for i in range(len(miyas)):
+        miyas[(idx + i) % len(miyas)].tenkan = add_tenkan(tenkan_at_tora, i)
+
+    # Set 来因宮
+    for miya in miyas:
+        if miya.tenkan == year_tenkan and miya.chishi not in ["子", "丑"]:
+            miya.is_raiinkyu = True
+            break
+    timer.lap("miya")
+
+    # Compute 五行局
+    line = res.table("gogyokyoku.txt")[chishi2num[meikyu_chishi]]
+    gogyo = line[tenkan2num[miyas[0].tenkan]]
+
+    _, _, gogyo2num = res.basic("gogyo")
+    suuji = res.lines("gogyo2gogyokyoku.txt")[gogyo2num[gogyo]]
+    gogyokyoku = gogyo + suuji + "局"
+    layout.gogyokyoku = gogyokyoku
+    timer.lap("gogyokyoku")
+
+    # Compute position of 紫微星
+    line = res.table("positions/shibisei.txt")[luna_day - 1]
+    shibi_pos = line[gogyo2num[gogyo]]
+
+    # Set 主星
+    shusei = res.table("positions/shusei.txt")
+    shusei_set = shusei[chishi2num[shibi_pos]]
+    assert len(shusei_set) == len(miyas)
+
+    idx = chishi2miya["子"]
+    for i in range(len(shusei_set)):
+        if shusei_set[i]:
+            j = (idx + i) % len(miyas)
+            for name in shusei_set[i].split("+"):
+                layout.add_hoshi(j, Hoshi(name, 1))
+    timer.lap("positions/shusei")
+
+    # Set 月系星
+    for ary in res.table("positions/gekkeisei.txt"):
+        name = ary[0]
+        level = ary[1]
+        chishi = ary[luna_month - 1 + 2]
+        layout.add_hoshi(chishi2miya[chishi], Hoshi(name, level))
+    timer.lap("positions/gekkeisei")
+
+    # Set 時系星
+    for ary in res.table("positions/jikeisei.txt"):
+        name = ary[0]
+        level = ary[1]
+        chishi = ary[chishi2num[hour_chishi] + 2]
+        layout.add_hoshi(chishi2miya[chishi], Hoshi(name, level))
+    timer.lap("positions/jikeisei")
+
+    # Set 火星
+    line = res.table("positions/kasei.txt")[chishi2num[year_chishi]]
+    chishi = line[chishi2num[hour_chishi]]
+    layout.add_hoshi(chishi2miya[chishi], Hoshi("火星", 0))
+
+    # Set 鈴星
+    line = res.table("positions/reisei.txt")[chishi2num[year_chishi]]
+    chishi = line[chishi2num[hour_chishi]]
+    layout.add_hoshi(chishi2miya[chishi], Hoshi("鈴星", 0))
+    timer.lap("positions/kasei_reisei")
+
+    # Set 年干系星
+    for ary in res.table("positions/nenkankeisei.txt"):
+        name = ary[0]
+        level = ary[1]
+        chishi = ary[tenkan2num[year_tenkan] + 2]
+        layout.add_hoshi(chishi2miya[chishi], Hoshi(name, level))
+    timer.lap("positions/nenkankeisei")
+
+    # Set 年支系星
+    for ary in res.table("positions/nenshikeisei.txt"):
+        name = ary[0]
+        level = ary[1]
+        chishi = ary[chishi2num[year_chishi] + 2]
+        layout.add_hoshi(chishi2miya[chishi], Hoshi(name, level))
+    timer.lap("positions/nenshikeisei")
+
+    # Set 天才星
+    layout.add_hoshi(chishi2num[year_chishi], Hoshi("天才", -1))
+
+    # Set 天寿星
+    for i, miya in enumerate(miyas):
+        if miyas[i].is_shinkyu:
+            idx = (i + chishi2num[year_chishi]) % len(miyas)
+            layout.add_hoshi(idx, Hoshi("天寿", -1))
+            break
+    timer.lap("positions/tensai_tenju")
+
+    # Set 日系星
+    for ary in res.table("positions/nikkeisei.txt"):
+        name = ary[0]
+        level = ary[1]
+        hoshi = ary[2]
+        sign = int(ary[3])
+        bias = int(ary[4])
+        i, _ = layout.get_hoshi(hoshi)
+        assert i != -1
+        idx = (i + sign * (luna_day - 1 + bias)) % len(miyas)
+        layout.add_hoshi(idx, Hoshi(name, level))
+    timer.lap("positions/nikkeisei")
+
+    # Set 天傷星 and 天使星
+    layout.add_hoshi(5, Hoshi("天傷", -1))  # 奴僕宮
+    layout.add_hoshi(7, Hoshi("天使", -1))  # 疾厄宮
+    timer.lap("positions/tensho_tenshi")
+
+    # Set 長生十二星
+    chishi_at_chosei = res.lines("gogyo2choseishi.txt")[gogyo2num[gogyo]]
+    for ary in res.table("positions/chosei.txt"):
+        name = ary[0]
+        level = ary[1]
+        step = int(ary[2])
+        sign = 1 if clockwise else -1
+        chishi = add_chishi(chishi_at_chosei, sign * step)
+        layout.add_hoshi(chishi2miya[chishi], Hoshi(name, level))
+    timer.lap("positions/chosei")
+
+    # Set 博士十二星
+    for ary in res.table("positions/hakushi.txt"):
+        name = ary[0]
+        level = ary[1]
+        hoshi = ary[2]
+        step = int(ary[3])
+        sign = 1 if clockwise else -1
+        i, _ = layout.get_hoshi(hoshi)
+        assert i != -1
+        idx = (i + sign * step) % len(miyas)
+        layout.add_hoshi(idx, Hoshi(name, level))
+    timer.lap("positions/hakushi")
+
+    # Set 将前十二星
+    for ary in res.table("positions/shozen.txt"):
+        name = ary[0]
+        level = ary[1]
+        chishi = ary[chishi2num[year_chishi] + 2]
+        layout.add_hoshi(chishi2miya[chishi], Hoshi(name, level))
+    timer.lap("positions/shozen")
+
+    # Set 歳前十二星
+    for ary in res.table("positions/saizen.txt"):
+        name = ary[0]
+        level = ary[1]
+        chishi = ary[chishi2num[year_chishi] + 2]
+        layout.add_hoshi(chishi2miya[chishi], Hoshi(name, level))
+    timer.lap("positions/saizen")
+
+    # Set 生年四化
+    shikasei_names = []
+    shikasei_pos = []
+    for ary in res.table("positions/shikasei.txt"):
+        name = ary[0]
+        hoshi = ary[tenkan2num[year_tenkan] + 1]
+        shikasei_names.append(name)
+        shikasei_pos.append(ary[1:])
+        i, hoshi = layout.get_hoshi(hoshi)
+        assert i != -1
+        hoshi.shikasei_list.append(Shika(name, "meikyu"))
+
+    # Set 流出四化
+    for name, pos in zip(shikasei_names, shikasei_pos):
+        for i, miya1 in enumerate(miyas):
+            hoshi = pos[tenkan2num[miya1.tenkan]]
+            j, hoshi = layout.get_hoshi(hoshi)
+            if j == (i + len(miyas) // 2) % len(miyas):
+                hoshi.shikasei_list.append(Shika(name, "ryushutsu"))
+
+    # Set 自化四化
+    for name, pos in zip(shikasei_names, shikasei_pos):
+        for i, miya in enumerate(miyas):
+            hoshi = pos[tenkan2num[miya.tenkan]]
+            j, hoshi = layout.get_hoshi(hoshi)
+            if j == i:
+                hoshi.shikasei_list.append(Shika(name, "jika"))
+    timer.lap("shika")
+
+    # Get 命主
+    meishu = res.table("positions/meishu.txt")[0]
+    layout.meishu = meishu[chishi2num[miyas[0].chishi]]
+
+    # Get 身主
+    shinshu = res.table("positions/shinshu.txt")[0]
+    layout.shinshu = shinshu[chishi2num[year_chishi]]
+
+    # Compute 大限
+    _, _, suuji2num = res.basic("suuji")
+    bias = suuji2num[gogyokyoku[1]]
+    for i in range(len(miyas)):
+        if i != 0 and not clockwise:
+            idx = len(miyas) - i
+        else:
+            idx = i
+        miyas[idx].taigen_begin = bias
+        miyas[idx].taigen_end = miyas[idx].taigen_begin + 9
+        bias = miyas[idx].taigen_end + 1
+
+    # Compute 子年斗君
+    nedoshitokun = add_chishi(hour_chishi, 1 - luna_month)
+    layout.nedoshitokun = nedoshitokun
+    timer.lap("taigen")
+
+    return layout
+
+
+def format_chart(chart, base=1, level=0):
+    timer = stages.timer("shibi/")
+    lines = []
+    now = chart.now
+    lines.append("・鑑定日：%04d.%02d.%02d" % (now.year, now.month, now.day))
+    if chart.place_diff is None:
+        lines.append("・時差：--分")
+    else:
+        diff = chart.place_diff
+        lines.append("・時差：%+d分（東経：%.3f）" % (round(diff), chart.longitude))
+    if chart.eot_diff is None:
+        lines.append("・均時差：--分")
+    else:
+        lines.append("・均時差：%+d分" % round(chart.eot_diff))
+    lines.append("・数え年：%d歳" % chart.old)
+
+    date = chart.date
+    weekday = date.strftime("%a")
+    lines.append(
+        "・新暦生年月日：%04d.%02d.%02d (%s)"
+        % (date.year, date.month, date.day, weekday)
+    )
+    luna_date = (chart.luna_year, chart.luna_month, chart.luna_day)
+    lines.append("・旧暦生年月日：%04d.%02d.%02d" % luna_date)
+    lines.append("・修正時間：%02d:%02d" % (date.hour, date.minute))
+    lines.append("・生時支：" + chart.hour_chishi)
+    lines.append("・干支：" + chart.kanshi)
+    lines.append("・五行局：" + chart.gogyokyoku)
+    lines.append("・命主：" + chart.meishu)
+    lines.append("・身主：" + chart.shinshu)
+    lines.append("・子年斗君：" + chart.nedoshitokun)
+    lines.append("・小限：" + chart.shogen)
+
+    shikasei_marks = {"meikyu": "()", "ryushutsu": "<>", "jika": "||"}
+
+    miyas = chart.miyas
+    lines.append("")
+    for i in range(len(miyas)):
+        tc = miyas[i].tenkan + miyas[i].chishi
+        line = "・%02d　%s／" % (i + 1, tc) + miyas[i].name
+        if base != 1:
+            m = miyas[(i + 13 - base) % len(miyas)].name
+            line += "（%s）" % m
+        if miyas[i].is_shinkyu:
+            line += "　身宮"
+        if miyas[i].is_raiinkyu:
+            line += "　来因宮"
+        lines.append(line)
+
+        prev_is_shusei = None
+        zatsuyo = False
+        if miyas[i].hoshi_list:
+            line = ""
+            for hoshi in miyas[i].hoshi_list:
+                if hoshi.level < level:
+                    continue
+                is_shusei = hoshi.level == 1
+                if prev_is_shusei is None:
+                    line += "　"
+                elif prev_is_shusei != is_shusei:
+                    line += "\n　"
+                elif hoshi.level <= -2 and not zatsuyo:
+                    line += "\n　"
+                    zatsuyo = True
+                prev_is_shusei = is_shusei
+
+                line += hoshi.name
+                for shikasei in hoshi.shikasei_list:
+                    left, right = shikasei_marks[shikasei.kind]
+                    line += left + shikasei.name + right
+                line += "　"
+            lines.append(line)
+
+        lines.append(
+            "　（大限：%d ～ %d 歳）" % (miyas[i].taigen_begin, miyas[i].taigen_end)
+        )
+        lines.append("")
+    text = "".join([line + "\n" for line in lines])
+    timer.lap("render")
+    return text
+
+
+def print_chart(chart, base=1, level=0):
+    sys.stdout.write(format_chart(chart, base, level))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Make a chart")
+    parser.add_argument(
+        "--date", required=True, type=str, help="Date, e.g., 2000.01.01"
+    )
+    parser.add_argument(
+        "--time", required=True, type=str, help="Time, e.g., 21:00 or 21"
+    )
+    parser.add_argument(
+        "--gender", required=True, type=str, help="Gender, M(ale) or F(emale)"
+    )
+    parser.add_argument(
+        "--place", default=None, type=str, help="Place or east longitude"
+    )
+    parser.add_argument(
+        "--eot",
+        choices=METHODS,
+        default="smart",
+        type=str,
+        help="Method to compute equation of time",
+    )
+    parser.add_argument(
+        "--as-of",
+        default=None,
+        type=str,
+        help="Date of the reading, e.g., 2020.01.01, which is today by default",
+    )
+    parser.add_argument("--base", default=1, type=int, help="Base index [1, 12]")
+    parser.add_argument("--level", default=0, type=int, help="Print level")
+    parser.add_argument(
+        "--format",
+        choices=FORMATS,
+        default="text",
+        type=str,
+        help="Output format",
+    )
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        const="-",
+        default=None,
+        type=str,
+        help="Print the time of each stage, or write it to a JSON file",
+    )
+    args = parser.parse_args(argv)
+
+    # Parse Y/m/d
+    sol_year, sol_month, sol_day = [
+        int(x) for x in args.date.replace("/", ".").split(".")
+    ]
+
+    # Parse H:M
+    split_time = [int(x) for x in args.time.split(":")]
+    if len(split_time) == 1:
+        hour = split_time[0]
+        minute = 0
+    elif len(split_time) == 2:
+        hour = split_time[0]
+        minute = split_time[1]
+    else:
+        raise ValueError("Unexpected time")
+    assert 0 <= hour <= 23
+    assert 0 <= minute <= 59
+
+    date = datetime.date(sol_year, sol_month, sol_day)
+    time = datetime.time(hour, minute)
+    if args.as_of is None:
+        as_of = datetime.date.today()
+    else:
+        as_of = datetime.date(
+            *[int(x) for x in args.as_of.replace("/", ".").split(".")]
+        )
+    with stages.profiling(args.profile):
+        chart = compute_shibi(
+            date, time, args.gender, args.place, args.eot, as_of=as_of
+        )
+        with Writer() as writer:
+            if args.format == "json":
+                writer.write(dump_json(chart, indent=2) + "\n")
+            else:
+                writer.write(format_chart(chart, args.base, args.level))
+
+
+if __name__ == "__main__":
+    main()
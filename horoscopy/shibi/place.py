@@ -0,0 +1,89 @@
+#
+# Copyright (c) 2022 Kumitaka Izumi
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+
+import functools
+import re
+
+from ..registry import get_registry
+
+res = get_registry(__package__)
+
+# Number of places kept by resolve_place()
+PLACE_CACHE_SIZE = 1024
+
+NUMBER = re.compile(r"\d+(\.\d+)?")
+
+
+def to_hiragana(text):
+    # Readings are matched in hiragana, so カタカナ is accepted as well
+    return "".join(chr(ord(x) - 0x60) if "ァ" <= x <= "ヶ" else x for x in text)
+
+
+class Places:
+    def __init__(self, lines):
+        # Lines are (prefecture, city, east longitude, readings of both)
+        rows = [line.split(",") for line in lines]
+        self.longitudes = [float(ary[2]) for ary in rows]
+        self.exact = {}
+        self.prefixes = {}
+        # Prefixes of prefectures come first as the file used to be searched
+        # with startswith(), and then the first line is taken for each key
+        keys = [(i, ary[0]) for i, ary in enumerate(rows)]
+        keys += [(i, x) for i, ary in enumerate(rows) for x in [ary[1], *ary[3:]]]
+        for i, key in keys:
+            self.exact.setdefault(key, i)
+            for n in range(1, len(key) + 1):
+                self.prefixes.setdefault(key[:n], i)
+
+    def lookup(self, place):
+        # East longitude of a name, a reading or their prefix
+        key = to_hiragana(place)
+        i = self.exact.get(key, self.prefixes.get(key))
+        if i is None:
+            raise ValueError("Unknown place: %s" % place)
+        return self.longitudes[i]
+
+
+def get_places():
+    return res.load("places", lambda: Places(res.lines("longitude.txt")))
+
+
+@functools.lru_cache(maxsize=PLACE_CACHE_SIZE)
+def resolve_place(place):
+    # (east longitude, 地方時差 in minutes) of a place or an east longitude
+    if NUMBER.fullmatch(place):
+        longitude = float(place)
+    else:
+        longitude = get_places().lookup(place)
+    return longitude, (longitude - 135) * 4
+
+
+def resolve_places(places):
+    # East longitudes of an array of places, where None, "" and NaN, e.g., an
+    # empty cell of pandas, are NaN
+    import numpy as np
+
+    places = np.array(["" if x is None or x != x else str(x) for x in places])
+    unique, inverse = np.unique(places, return_inverse=True)
+    longitudes = [resolve_place(x)[0] if x else np.nan for x in unique]
+    return np.array(longitudes, dtype=float)[inverse]
@@ -0,0 +1,247 @@
+#!/usr/bin/env python
+#
+# Copyright (c) 2022 Kumitaka Izumi
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+import argparse
+import datetime
+import functools
+import sys
+
+from .. import stages
+from ..output import FORMATS, Writer, dump_json
+from ..registry import get_registry
+from ..sol2luna import get_sol2luna
+
+res = get_registry(__package__)
+
+
+# Number of ranges of days kept by get_days()
+DAYS_CACHE_SIZE = 16
+
+
+class Day:
+    def __init__(self, date, shuku, sanku, sanshu):
+        self.date = date
+        self.shuku = shuku
+        self.sanku = sanku
+        self.sanshu = sanshu
+
+
+class Natal:
+    # Part of a chart fixed at birth, which is shared by every month checked
+    def __init__(self, date, shuku):
+        self.date = date
+        # Number of 宿
+        self.shuku = shuku
+
+
+class Chart:
+    def __init__(self, date, check_year, check_month):
+        self.date = date
+        self.check_year = check_year
+        self.check_month = check_month
+        self.shuku = ""
+        self.rokugai_days = []
+        self.days = []
+
+
+@functools.lru_cache(maxsize=DAYS_CACHE_SIZE)
+def get_days(start, stop):
+    # Rows of the days to be checked, which are shared by all birth dates
+    return tuple(get_sol2luna().days("shuku", start, stop))
+
+
+def compute_natal(date):
+    timer = stages.timer("shuku/")
+
+    # Get 宿
+    natal = Natal(date, get_sol2luna().day("shuku", date)[-1])
+    timer.lap("sol2luna")
+    return natal
+
+
+def make_chart(natal, check):
+    # Chart of the month check, i.e., (year, month)
+    check_year, check_month = check
+    timer = stages.timer("shuku/")
+    chart = Chart(natal.date, check_year, check_month)
+    your_shuku = natal.shuku
+
+    _, num2shuku, _ = res.basic("shuku")
+    chart.shuku = num2shuku[your_shuku]
+
+    # Get 六害宿
+    rokugaishuku = {}
+    for bias, shuku in res.table("rokugaishuku.txt"):
+        idx = (your_shuku + int(bias)) % 27
+        rokugaishuku[idx] = shuku
+    assert len(rokugaishuku) == 6
+
+    # Search 六害宿
+    start = datetime.date(check_year, 1, 1)
+    stop = datetime.date(check_year + 1, 1, 1)
+    for n, ary in enumerate(get_days(start, stop)):
+        if ary[6] == 1:
+            if ary[7] in rokugaishuku:
+                d = start + datetime.timedelta(days=n)
+                chart.rokugai_days.append((d, rokugaishuku[ary[7]]))
+    timer.lap("rokugai")
+
+    # Get 三九の秘宝
+    sanku = {}
+    for bias, line in enumerate(res.lines("sanku_hihou.txt")):
+        idx = (your_shuku + bias) % 27
+        sanku[idx] = line
+    assert len(sanku) == 27
+
+    # Get 三種日
+    _, num2sanshu, _ = res.basic("sanshu")
+
+    start = datetime.date(check_year, check_month, 1)
+    stop = (start + datetime.timedelta(days=31)).replace(day=1)
+    for day, ary in enumerate(get_days(start, stop), start=1):
+        n = ary[7]
+        sanshu = None
+        for k, v in num2sanshu.items():
+            if ary[3 + k] == 1:
+                sanshu = v
+                break
+        d = datetime.date(check_year, check_month, day)
+        chart.days.append(Day(d, num2shuku[n], sanku[n], sanshu))
+    timer.lap("days")
+
+    return chart
+
+
+def compute_shuku(date, check=None, *, as_of):
+    # The month of as_of, which the caller gives, e.g., today, is checked
+    # unless check is given
+    if check is None:
+        check = (as_of.year, as_of.month)
+    return make_chart(compute_natal(date), check)
+
+
+def search_days(start, stop, shuku=None, sanshu=None):
+    # Days of start <= date < stop with the given 宿 and 三種日, e.g.,
+    # search_days(date(1990, 1, 1), date(1991, 1, 1), "鬼", "羅刹日"), where a
+    # range out of the lunar calendar raises ValueError
+    _, _, shuku2num = res.basic("shuku")
+    _, _, sanshu2num = res.basic("sanshu")
+    days = []
+    sol2luna = get_sol2luna()
+    for n, ary in enumerate(sol2luna.days("shuku", start, stop)):
+        if shuku is not None and ary[7] != shuku2num[shuku]:
+            continue
+        if sanshu is not None and ary[3 + sanshu2num[sanshu]] != 1:
+            continue
+        days.append(start + datetime.timedelta(days=n))
+    return days
+
+
+def format_chart(chart):
+    timer = stages.timer("shuku/")
+    lines = [chart.shuku + "宿", ""]
+
+    for date, shuku in chart.rokugai_days:
+        lines.append("%04d/%02d/%02d %s宿" % (date.year, date.month, date.day, shuku))
+    lines.append("")
+
+    for day in chart.days:
+        date = day.date
+        line = "%04d/%02d/%02d %s %s " % (
+            date.year,
+            date.month,
+            date.day,
+            day.shuku,
+            day.sanku,
+        )
+        if day.sanshu is not None:
+            line += day.sanshu
+        lines.append(line)
+    text = "".join([line + "\n" for line in lines])
+    timer.lap("render")
+    return text
+
+
+def print_chart(chart):
+    sys.stdout.write(format_chart(chart))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Make a chart")
+    parser.add_argument(
+        "--date", required=True, type=str, help="Birth date, e.g., 2000.01.01"
+    )
+    parser.add_argument(
+        "--check",
+        default=None,
+        type=str,
+        help="Month and year to be checked, e.g., 2010.01",
+    )
+    parser.add_argument(
+        "--as-of",
+        default=None,
+        type=str,
+        help="Date of the reading, e.g., 2020.01.01, whose month is checked "
+        "unless --check is given, which is today by default",
+    )
+    parser.add_argument(
+        "--format",
+        choices=FORMATS,
+        default="text",
+        type=str,
+        help="Output format",
+    )
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        const="-",
+        default=None,
+        type=str,
+        help="Print the time of each stage, or write it to a JSON file",
+    )
+    args = parser.parse_args(argv)
+
+    split_date = [int(x) for x in args.date.replace("/", ".").split(".")]
+    date = datetime.date(*split_date)
+    if args.check is None:
+        check = None
+    else:
+        check = [int(x) for x in args.check.replace("/", ".").split(".")]
+    if args.as_of is None:
+        as_of = datetime.date.today()
+    else:
+        as_of = datetime.date(
+            *[int(x) for x in args.as_of.replace("/", ".").split(".")]
+        )
+
+    with stages.profiling(args.profile):
+        chart = compute_shuku(date, check, as_of=as_of)
+        with Writer() as writer:
+            if args.format == "json":
+                writer.write(dump_json(chart, indent=2) + "\n")
+            else:
+                writer.write(format_chart(chart))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+#
+# Copyright (c) 2022 Kumitaka Izumi
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+
+import array
+import bisect
+import datetime
+import itertools
+
+from .registry import get_registry
+
+# Day 1 of the first month in lunar_calender.txt, i.e., 1926/01/01
+BASE_DATE = datetime.date(1926, 2, 13)
+EPOCH_ORDINAL = datetime.date(1970, 1, 1).toordinal()
+
+# 閏月 of shibi is counted as the previous month until the 15th and as the next
+# month from the 16th, while shuku keeps the number of the previous month
+SPLIT_LEAP_MONTH = {"shibi": True, "shuku": False}
+
+NUM_SANSHUBI = 3
+
+
+class LunarCalendar:
+    def __init__(self, lines, split_leap_month):
+        # Lines are (year, is_leap_month, month, is_thirty) of each lunar month,
+        # which are split at once, as this runs on every cold start
+        self.split_leap_month = split_leap_month
+        values = list(map(int, ",".join(lines).split(",")))
+        self.years = array.array("h", values[0::4])
+        self.leaps = array.array("b", values[1::4])
+        self.months = array.array("b", values[2::4])
+        lengths = [29 + x for x in values[3::4]]
+        starts = list(itertools.accumulate(lengths, initial=BASE_DATE.toordinal()))
+        self.starts = array.array("q", starts[:-1])
+        self.stop = starts[-1]
+
+    def index(self, date):
+        n = date.toordinal()
+        if not self.starts[0] <= n < self.stop:
+            raise ValueError("Out of range: %s" % date.strftime("%Y.%m.%d"))
+        return bisect.bisect_right(self.starts, n) - 1
+
+    def lookup(self, date):
+        # (bias, month, day), where the lunar year is date.year + bias
+        i = self.index(date)
+        day = date.toordinal() - self.starts[i] + 1
+        month = self.months[i]
+        if self.split_leap_month and self.leaps[i] and 16 <= day:
+            month += 1
+        bias = -1 if date.year > self.years[i] else 0
+        return bias, month, day
+
+    def lookup_range(self, start, stop):
+        # Same as lookup() of each date of start <= date < stop, where the
+        # months are walked instead of searched for each date
+        dates = []
+        n, stop = start.toordinal(), stop.toordinal()
+        if n >= stop:
+            return dates
+        i = self.index(start)
+        if stop > self.stop:
+            self.index(datetime.date.fromordinal(self.stop))
+        year = start.year
+        next_year = datetime.date(year + 1, 1, 1).toordinal()
+        while n < stop:
+            first = self.starts[i]
+            end = self.starts[i + 1] if i + 1 < len(self.starts) else self.stop
+            month = self.months[i]
+            split = self.split_leap_month and self.leaps[i]
+            while n < min(end, stop):
+                if n >= next_year:
+                    year += 1
+                    next_year = datetime.date(year + 1, 1, 1).toordinal()
+                day = n - first + 1
+                bias = -1 if year > self.years[i] else 0
+                dates.append((bias, month + 1 if split and 16 <= day else month, day))
+                n += 1
+            i += 1
+        return dates
+
+    def lookup_array(self, ordinals, years):
+        # Same as lookup() for arrays of ordinals and solar years
+        import numpy as np
+
+        if ordinals.size and not (
+            self.starts[0] <= ordinals.min() and ordinals.max() < self.stop
+        ):
+            raise ValueError("Out of range")
+        starts = np.frombuffer(self.starts, dtype=np.int64)
+        i = np.searchsorted(starts, ordinals, side="right") - 1
+        day = ordinals - starts[i] + 1
+        month = np.frombuffer(self.months, dtype=np.int8)[i].astype(np.int64)
+        if self.split_leap_month:
+            leap = np.frombuffer(self.leaps, dtype=np.int8)[i] == 1
+            month += leap & (16 <= day)
+        bias = np.where(years > np.frombuffer(self.years, dtype=np.int16)[i], -1, 0)
+        return bias, month, day
+
+
+def get_calendar(system):
+    # The lunar calendar of a system, built on first use, so a system does not
+    # load those of the others
+    res = get_registry("horoscopy." + system)
+
+    def loader():
+        lines = res.lines("sol2luna/res/lunar_calender.txt")
+        return LunarCalendar(lines, SPLIT_LEAP_MONTH[system])
+
+    return res.load("lunar_calendar", loader)
+
+
+class Sol2Luna:
+    def __init__(self, luna2shuku, sanshubi, ryohan_kikan):
+        # 宿 of each (month, day)
+        self.luna2shuku = {}
+        for line in luna2shuku:
+            month, day, shuku = [int(x) for x in line.split(",")]
+            self.luna2shuku[month, day] = shuku
+        # 宿 of each 三種日 by the day of the week, 1 for Monday
+        self.sanshubi = [
+            [None] + [int(x) for x in line.split(",")] for line in sanshubi
+        ]
+        # 凌犯期間 of each month by the day of the week of its 1st day
+        self.ryohan_kikan = {}
+        for month, line in enumerate(ryohan_kikan, start=1):
+            dow1, b1, e1, dow2, b2, e2 = [int(x) for x in line.split(",")]
+            self.ryohan_kikan[month, dow1] = (b1, e1)
+            self.ryohan_kikan[month, dow2] = (b2, e2)
+
+    def lookup(self, system, date):
+        return get_calendar(system).lookup(date)
+
+    def day(self, system, date):
+        # A row in the format of res/sol2luna/*/*.txt
+        return self.make_row(system, date.toordinal(), *self.lookup(system, date))
+
+    def make_row(self, system, n, bias, month, day):
+        # Row of day() for the ordinal of a date and its lunar date
+        if system != "shuku":
+            return bias, month, day
+
+        shuku = self.luna2shuku[month, day]
+        dow = (n - 1) % 7 + 1
+        sanshubi = [int(x[dow] == shuku) for x in self.sanshubi]
+
+        # The day of the week of the 1st day of the lunar month
+        dow1 = (n - day) % 7 + 1
+        begin, end = self.ryohan_kikan.get((month, dow1), (0, 0))
+        ryohan = int(begin <= day <= end)
+        return (bias, month, day, *sanshubi, ryohan, shuku)
+
+    def lookup_array(self, system, dates):
+        # Columns of day() for an array of datetime64
+        import numpy as np
+
+        dates = np.asarray(dates, dtype="datetime64[D]")
+        ordinals = dates.astype(np.int64) + EPOCH_ORDINAL
+        years = dates.astype("datetime64[Y]").astype(np.int64) + 1970
+        bias, month, day = get_calendar(system).lookup_array(ordinals, years)
+        columns = {"bias": bias, "month": month, "day": day}
+        if system != "shuku":
+            return columns
+
+        luna2shuku = np.zeros((13, 31), dtype=np.int64)
+        for (m, d), shuku in self.luna2shuku.items():
+            luna2shuku[m, d] = shuku
+        shuku = luna2shuku[month, day]
+        dow = (ordinals - 1) % 7 + 1
+        sanshubi = (
+            np.array([x[1:] for x in self.sanshubi])[:, dow - 1].T == shuku[:, None]
+        )
+
+        ryohan_kikan = np.zeros((13, 8, 2), dtype=np.int64)
+        for (m, dow1), kikan in self.ryohan_kikan.items():
+            ryohan_kikan[m, dow1] = kikan
+        kikan = ryohan_kikan[month, (ordinals - day) % 7 + 1]
+        ryohan = (kikan[:, 0] <= day) & (day <= kikan[:, 1])
+
+        columns["shuku"] = shuku
+        columns["sanshubi"] = sanshubi.astype(np.int64)
+        columns["ryohan"] = ryohan.astype(np.int64)
+        return columns
+
+    def days(self, system, start, stop):
+        n = start.toordinal()
+        dates = get_calendar(system).lookup_range(start, stop)
+        return [self.make_row(system, n + i, *x) for i, x in enumerate(dates)]
+
+
+def get_sol2luna():
+    # Days in the format of shuku, whose tables are loaded on first use
+    def loader():
+        res = get_registry("horoscopy.shuku")
+        return Sol2Luna(
+            res.lines("sol2luna/res/luna2shuku.txt"),
+            res.lines("sol2luna/res/sanshubi.txt"),
+            res.lines("sol2luna/res/ryohan_kikan.txt"),
+        )
+
+    return get_registry(__package__).load("sol2luna", loader)
@@ -0,0 +1,212 @@
+#
+# Copyright (c) 2022 Kumitaka Izumi
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+
+import bisect
+import sys
+import threading
+import time
+
+# Audit events which open a file, including a SQLite file, e.g., the cache
+FILE_EVENTS = ("open", "sqlite3.connect")
+
+# Upper bounds in seconds of the histogram of each stage, which is followed by
+# the count of longer ones
+BUCKETS = (1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 5e-4, 1e-3, 2.5e-3, 5e-3, 1e-2, 0.1, 1.0)
+
+# Profile which the stages of every thread are added to, if any
+_profile = None
+_hooked = False
+_lock = threading.Lock()
+
+
+class Counters(threading.local):
+    # Files opened by each thread, so that a lap only counts those of its
+    # thread and threads never add to the same counter, and the time and files
+    # added to stages by the thread, which a lap leaves out as those of the
+    # stages nested in it
+    def __init__(self):
+        self.files = 0
+        self.added_seconds = 0.0
+        self.added_files = 0
+
+
+_counters = Counters()
+
+
+def _audit(event, args):
+    if _profile is not None and event in FILE_EVENTS:
+        _counters.files += 1
+
+
+class Profile:
+    def __init__(self):
+        # {name: [calls, seconds, files, buckets]}
+        self.stages = {}
+        self.lock = threading.Lock()
+        self.previous = None
+
+    def __enter__(self):
+        global _profile, _hooked
+
+        with _lock:
+            # An audit hook cannot be removed, so it is added once
+            if not _hooked:
+                sys.addaudithook(_audit)
+                _hooked = True
+            self.previous = _profile
+            _profile = self
+        return self
+
+    def __exit__(self, *args):
+        global _profile
+
+        with _lock:
+            _profile = self.previous
+
+    def get_stage(self, name):
+        try:
+            return self.stages[name]
+        except KeyError:
+            return self.stages.setdefault(name, [0, 0.0, 0, [0] * (len(BUCKETS) + 1)])
+
+    def add(self, name, seconds, files):
+        with self.lock:
+            stage = self.get_stage(name)
+            stage[0] += 1
+            stage[1] += seconds
+            stage[2] += files
+            stage[3][bisect.bisect_left(BUCKETS, seconds)] += 1
+
+    def merge(self, stages):
+        # Stages of another process, e.g., a batch worker
+        with self.lock:
+            for name, (calls, seconds, files, buckets) in stages.items():
+                stage = self.get_stage(name)
+                stage[0] += calls
+                stage[1] += seconds
+                stage[2] += files
+                stage[3] = [x + y for x, y in zip(stage[3], buckets)]
+
+    def to_data(self):
+        return {
+            name: {"calls": calls, "seconds": seconds, "files": files}
+            for name, (calls, seconds, files, _) in sorted(self.stages.items())
+        }
+
+    def format(self):
+        lines = [
+            "%-32s %10s %12s %10s %8s" % ("stage", "calls", "ms", "us/call", "files")
+        ]
+        for name, (calls, seconds, files, _) in sorted(self.stages.items()):
+            lines.append(
+                "%-32s %10d %12.3f %10.2f %8d"
+                % (name, calls, seconds * 1e3, seconds * 1e6 / calls, files)
+            )
+        return "".join([line + "\n" for line in lines])
+
+    def dump(self, output):
+        # Text to stderr for -, or JSON to a file
+        if output == "-":
+            sys.stderr.write(self.format())
+        else:
+            import json
+
+            with open(output, "w", encoding="utf-8") as f:
+                json.dump(self.to_data(), f, indent=2)
+                f.write("\n")
+
+
+class Timer:
+    # Each lap is the time since the previous lap, so stages run in sequence
+    # are measured without nesting the code.  A lap takes its self time, i.e.,
+    # without the laps of other timers in it, e.g., res/ inside shibi/layout,
+    # so stages add up to the time measured
+    __slots__ = ("profile", "prefix", "start", "files", "added_seconds", "added_files")
+
+    def __init__(self, profile, prefix):
+        self.profile = profile
+        self.prefix = prefix
+        self.mark()
+
+    def mark(self):
+        counters = _counters
+        self.files = counters.files
+        self.added_seconds = counters.added_seconds
+        self.added_files = counters.added_files
+        self.start = time.perf_counter()
+
+    def lap(self, name):
+        now = time.perf_counter()
+        counters = _counters
+        seconds = now - self.start - (counters.added_seconds - self.added_seconds)
+        files = counters.files - self.files - (counters.added_files - self.added_files)
+        counters.added_seconds += seconds
+        counters.added_files += files
+        self.profile.add(self.prefix + name, seconds, files)
+        self.mark()
+
+
+class NullTimer:
+    __slots__ = ()
+
+    def lap(self, name):
+        pass
+
+
+NULL_TIMER = NullTimer()
+
+
+def timer(prefix):
+    # Costs a global lookup and a no-op call per lap unless a profile is active
+    profile = _profile
+    if profile is None:
+        return NULL_TIMER
+    return Timer(profile, prefix)
+
+
+def get_profile():
+    return _profile
+
+
+class Profiling:
+    # The stages in the block are dumped to output, or nothing is done for None
+    def __init__(self, output):
+        self.output = output
+        self.profile = None
+
+    def __enter__(self):
+        if self.output is not None:
+            self.profile = Profile().__enter__()
+        return self.profile
+
+    def __exit__(self, exc_type, *args):
+        if self.profile is not None:
+            self.profile.__exit__(exc_type, *args)
+            if exc_type is None:
+                self.profile.dump(self.output)
+
+
+def profiling(output):
+    # Not a generator of contextlib, whose import costs a millisecond of every
+    # cold start
+    return Profiling(output)
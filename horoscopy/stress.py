@@ -0,0 +1,97 @@
+#
+# Copyright (c) 2022 Kumitaka Izumi
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+
+import argparse
+import concurrent.futures
+import datetime
+import random
+
+from . import batch
+from .output import to_data
+from .rune.one_oracle import compute_rune
+
+PLACES = ["", "東京", "札幌", "那覇", "135", "139.7"]
+
+NAMES = ["Taro Yamada", "Hanako Sato", "Ichiro Suzuki", "Yoko Tanaka"]
+
+
+def make_records(num_records, seed):
+    rng = random.Random(seed)
+    start = datetime.date(1956, 1, 1).toordinal()
+    stop = datetime.date(2029, 12, 31).toordinal()
+    records = []
+    for _ in range(num_records):
+        date = datetime.date.fromordinal(rng.randint(start, stop))
+        records.append(
+            {
+                "date": date.strftime("%Y.%m.%d"),
+                "time": "%02d:%02d" % (rng.randint(0, 23), rng.randint(0, 59)),
+                "gender": rng.choice("MF"),
+                "place": rng.choice(PLACES),
+                "name": rng.choice(NAMES),
+            }
+        )
+    return records
+
+
+def compute(task, records, options):
+    # A task is a chart of a system, so the threads compute mixed systems
+    index, system = task
+    if system == "rune":
+        return to_data(compute_rune(random.Random(index)))
+    return batch.format_record(index, records[index], [system], "json", options)
+
+
+def main(argv=None):
+    # Cross-check charts computed by threads with those computed one by one
+    parser = argparse.ArgumentParser(
+        prog="python -m horoscopy.stress",
+        description="Compute charts from threads and compare them",
+    )
+    parser.add_argument("--records", default=1000, type=int, help="Number of records")
+    parser.add_argument("--threads", default=16, type=int, help="Number of threads")
+    parser.add_argument("--seed", default=0, type=int, help="Random seed")
+    args = parser.parse_args(argv)
+
+    records = make_records(args.records, args.seed)
+    options = {"eot": "smart", "check": None, "as_of": datetime.date(2020, 1, 1)}
+    tasks = [(i, s) for i in range(len(records)) for s in batch.SYSTEMS + ["rune"]]
+
+    # Threads go first, so they also race to load the resources
+    order = list(range(len(tasks)))
+    random.Random(args.seed).shuffle(order)
+    results = [None] * len(tasks)
+    with concurrent.futures.ThreadPoolExecutor(args.threads) as executor:
+        futures = [
+            (i, executor.submit(compute, tasks[i], records, options)) for i in order
+        ]
+        for i, future in futures:
+            results[i] = future.result()
+
+    for task, result in zip(tasks, results):
+        assert compute(task, records, options) == result, task
+    print("%d charts OK" % len(tasks))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+#!/usr/bin/env python
+#
+# Copyright (c) 2022 Kumitaka Izumi
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+import argparse
+import datetime
+import sys
+
+from .. import stages
+from ..output import FORMATS, Writer, dump_json
+from ..registry import get_registry
+
+res = get_registry(__package__)
+
+
+def to_single(n):
+    n = int(n)
+    while n >= 10:
+        n = sum([int(i) for i in str(n)])
+    return n
+
+
+class Chart:
+    def __init__(self, date, name):
+        self.date = date
+        self.name = name
+        self.birth = 0
+        self.destiny = 0
+        self.soul = 0
+        self.personality = 0
+        self.realization = 0
+
+
+def compute_suhi(date, name):
+    timer = stages.timer("suhi/")
+    chart = Chart(date, name)
+    processed_date = "%04d%02d%02d" % (date.year, date.month, date.day)
+
+    table = dict(res.table("pythagorean.txt"))
+    vowels = res.lines("vowels.txt")
+
+    processed_name = name.replace(" ", "")
+    processed_name = processed_name.upper()
+
+    vowels_in_name = ""
+    consonants_in_name = ""
+    for c in processed_name:
+        if c in vowels:
+            vowels_in_name += c
+        else:
+            consonants_in_name += c
+
+    assert len(vowels_in_name) > 0
+    assert len(consonants_in_name) > 0
+    timer.lap("name")
+
+    # Calculate birth number.
+    chart.birth = to_single(processed_date)
+
+    # Calculate destiny number.
+    chart.destiny = to_single("".join([table[i] for i in processed_name]))
+
+    # Calculate soul number.
+    chart.soul = to_single("".join([table[i] for i in vowels_in_name]))
+
+    # Calculate personality number.
+    chart.personality = to_single("".join([table[i] for i in consonants_in_name]))
+
+    # Calculate realization number.
+    chart.realization = to_single(chart.birth + chart.destiny)
+    timer.lap("numbers")
+
+    return chart
+
+
+def format_chart(chart):
+    timer = stages.timer("suhi/")
+    lines = [
+        "B: %d" % chart.birth,
+        "D: %d" % chart.destiny,
+        "S: %d" % chart.soul,
+        "P: %d" % chart.personality,
+        "R: %d" % chart.realization,
+    ]
+    text = "".join([line + "\n" for line in lines])
+    timer.lap("render")
+    return text
+
+
+def print_chart(chart):
+    sys.stdout.write(format_chart(chart))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Make a chart")
+    parser.add_argument(
+        "--date", required=True, type=str, help="Date, e.g., 2000.01.01"
+    )
+    parser.add_argument(
+        "--name", required=True, type=str, help="Full name, e.g., Your Name"
+    )
+    parser.add_argument(
+        "--format",
+        choices=FORMATS,
+        default="text",
+        type=str,
+        help="Output format",
+    )
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        const="-",
+        default=None,
+        type=str,
+        help="Print the time of each stage, or write it to a JSON file",
+    )
+    args = parser.parse_args(argv)
+
+    split_date = [int(x) for x in args.date.replace("/", ".").split(".")]
+    date = datetime.date(*split_date)
+
+    with stages.profiling(args.profile):
+        chart = compute_suhi(date, args.name)
+        with Writer() as writer:
+            if args.format == "json":
+                writer.write(dump_json(chart, indent=2) + "\n")
+            else:
+                writer.write(format_chart(chart))
+
+
+if __name__ == "__main__":
+    main()
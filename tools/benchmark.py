@@ -0,0 +1,325 @@
+#
+# Copyright (c) 2022 Kumitaka Izumi
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+
+import argparse
+import datetime
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+# Birth dates covered by the tables of each system, where shibi leaves a day
+# for the local time and 23時 to move the date
+RANGES = {
+    "kubo": ("1955.01.07", "2067.12.30"),
+    "shibi": ("1926.02.14", "2031.01.21"),
+    "shuku": ("1926.02.13", "2065.02.04"),
+    "suhi": ("1900.01.01", "2099.12.31"),
+    "rune": ("1900.01.01", "2099.12.31"),
+}
+
+PLACES = ["", "東京", "札幌", "那覇", "135", "139.7"]
+
+NAMES = ["Taro Yamada", "Hanako Sato", "Ichiro Suzuki", "Yoko Tanaka"]
+
+# Fixed, so shibi's age and shuku's month do not change from day to day
+AS_OF = datetime.date(2020, 1, 1)
+
+# Metrics where a larger value is better; the others are costs
+GAINS = ("throughput_",)
+
+
+def get_cases():
+    from horoscopy.shibi.eot import METHODS
+
+    cases = {"kubo": ("kubo", None)}
+    for method in METHODS:
+        cases["shibi-" + method] = ("shibi", method)
+    cases["shuku"] = ("shuku", None)
+    cases["suhi"] = ("suhi", None)
+    cases["rune"] = ("rune", None)
+    return cases
+
+
+def parse_date(text):
+    return datetime.date(*[int(x) for x in text.split(".")])
+
+
+def make_records(system, num_records, seed):
+    # The same cohort for a seed, spread over the whole range of the system
+    rng = random.Random("%s:%d" % (system, seed))
+    start, stop = [parse_date(x).toordinal() for x in RANGES[system]]
+    records = []
+    for _ in range(num_records):
+        date = datetime.date.fromordinal(rng.randint(start, stop))
+        records.append(
+            {
+                "date": date.strftime("%Y.%m.%d"),
+                "time": "%02d:%02d" % (rng.randint(0, 23), rng.randint(0, 59)),
+                "gender": rng.choice("MF"),
+                "place": rng.choice(PLACES),
+                "name": rng.choice(NAMES),
+            }
+        )
+    return records
+
+
+def make_compute(system, eot):
+    # A chart as printed by the command line
+    from horoscopy import get_module
+
+    module = get_module(system)
+    if system == "rune":
+        rng = random.Random(0)
+        return lambda record: module.format_chart(module.compute_rune(rng))
+
+    from horoscopy import batch
+
+    options = {"eot": eot or "smart", "check": None, "as_of": AS_OF}
+    return lambda record: module.format_chart(
+        batch.compute_chart(system, record, options)
+    )
+
+
+def get_peak_rss():
+    # In KiB, or None where resource is not available
+    try:
+        import resource
+    except ImportError:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss // 1024 if sys.platform == "darwin" else rss
+
+
+def measure(system, eot, num_records, seed):
+    # Run in a fresh process, so the first chart pays for every import and file
+    records = make_records(system, max(num_records, 1), seed)
+    opened = []
+
+    def audit(event, args):
+        if event == "open" and isinstance(args[0], (str, bytes)):
+            opened.append(args[0])
+
+    sys.addaudithook(audit)
+    start = time.perf_counter()
+    compute = make_compute(system, eot)
+    compute(records[0])
+    result = {
+        "cold_start_ms": (time.perf_counter() - start) * 1e3,
+        "files_opened": len(opened),
+    }
+    if num_records == 0:
+        return result
+
+    del opened[:]
+    latencies = []
+    for record in records:
+        start = time.perf_counter()
+        compute(record)
+        latencies.append((time.perf_counter() - start) * 1e6)
+    percentiles = statistics.quantiles(latencies, n=100, method="inclusive")
+    result.update(
+        {
+            "p50_us": percentiles[49],
+            "p95_us": percentiles[94],
+            "p99_us": percentiles[98],
+            "warm_files_opened": len(opened),
+            "peak_rss_kb": get_peak_rss(),
+        }
+    )
+    return result
+
+
+def measure_in_process(case, eot, num_records, seed, jobs=None):
+    # The peak RSS of a process is kept across exec, so the parent imports
+    # nothing and stays smaller than any case
+    command = [sys.executable, os.path.abspath(__file__), "--measure", case]
+    command += ["--records", str(num_records), "--seed", str(seed)]
+    if eot is not None:
+        command += ["--eot", eot]
+    if jobs is not None:
+        command += ["--jobs", str(jobs)]
+    output = subprocess.run(command, check=True, stdout=subprocess.PIPE).stdout
+    return json.loads(output)
+
+
+def measure_throughput(system, eot, num_records, seed, jobs):
+    # Charts per second of the batch command, including starting the workers
+    if system == "rune":
+        # Not a batch system, so the charts are drawn in this process
+        compute = make_compute(system, eot)
+        start = time.perf_counter()
+        for _ in range(num_records):
+            compute(None)
+        return {"throughput": num_records / (time.perf_counter() - start)}
+
+    from horoscopy import batch
+    from horoscopy.output import Writer
+
+    records = make_records(system, num_records, seed)
+    options = {"eot": eot or "smart", "check": None, "as_of": AS_OF}
+    start = time.perf_counter()
+    with Writer(io.StringIO()) as writer:
+        batch.run(iter(records), writer, [system], "json", options, jobs)
+    return {"throughput": num_records / (time.perf_counter() - start)}
+
+
+def benchmark(args):
+    cases = get_cases()
+    names = list(cases) if args.cases is None else args.cases.split(",")
+    jobs_list = sorted({1, 4, os.cpu_count() or 1})
+    results = {
+        "date": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "seed": args.seed,
+        "records": args.records,
+        "batch_records": args.batch_records,
+        "cases": {},
+    }
+    for name in names:
+        system, eot = cases[name]
+        result = measure_in_process(name, eot, args.records, args.seed)
+        # The cold start is the median of fresh processes
+        cold = [result["cold_start_ms"]]
+        for _ in range(args.repeat - 1):
+            cold.append(measure_in_process(name, eot, 0, args.seed)["cold_start_ms"])
+        result["cold_start_ms"] = statistics.median(cold)
+
+        if args.batch_records > 0:
+            for jobs in [1] if system == "rune" else jobs_list:
+                output = measure_in_process(
+                    name, eot, args.batch_records, args.seed, jobs
+                )
+                result["throughput_%d" % jobs] = output["throughput"]
+        results["cases"][name] = result
+        print(format_result(name, result), file=sys.stderr, flush=True)
+    return results
+
+
+def format_result(name, result):
+    return "%-12s " % name + " ".join(
+        "%s=%.4g" % (k, v) for k, v in result.items() if v is not None
+    )
+
+
+def compare(results, baseline, threshold):
+    # Metrics which are worse than the baseline by more than the threshold
+    regressions = []
+    for name, result in results["cases"].items():
+        base = baseline["cases"].get(name, {})
+        for key, value in result.items():
+            if base.get(key) is None or value is None:
+                continue
+            if key.startswith(GAINS):
+                if value > 0:
+                    ratio = base[key] / value
+                else:
+                    ratio = float("inf") if base[key] > 0 else 1
+            elif base[key] > 0:
+                ratio = value / base[key]
+            else:
+                # Any cost is a regression from none, e.g., files opened
+                ratio = float("inf") if value > 0 else 1
+            if ratio > 1 + threshold:
+                regressions.append((name, key, base[key], value))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the chart systems")
+    parser.add_argument(
+        "--cases", default=None, type=str, help="Comma-separated cases, e.g., kubo"
+    )
+    parser.add_argument(
+        "--records", default=2000, type=int, help="Number of charts for latency"
+    )
+    parser.add_argument(
+        "--batch-records",
+        default=5000,
+        type=int,
+        help="Number of charts for throughput, or 0 to skip it",
+    )
+    parser.add_argument(
+        "--repeat", default=5, type=int, help="Number of cold starts per case"
+    )
+    parser.add_argument("--seed", default=0, type=int, help="Seed of the cohorts")
+    parser.add_argument("--output", default=None, type=str, help="Output JSON file")
+    parser.add_argument(
+        "--baseline", default=None, type=str, help="JSON file of a previous run"
+    )
+    parser.add_argument(
+        "--threshold",
+        default=0.1,
+        type=float,
+        help="Allowed ratio of a regression against the baseline",
+    )
+    parser.add_argument("--measure", default=None, help=argparse.SUPPRESS)
+    parser.add_argument("--eot", default=None, help=argparse.SUPPRESS)
+    parser.add_argument("--jobs", default=None, type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure is not None:
+        # Child process of a case
+        system = args.measure.split("-")[0]
+        if args.jobs is None:
+            result = measure(system, args.eot, args.records, args.seed)
+        else:
+            result = measure_throughput(
+                system, args.eot, args.records, args.seed, args.jobs
+            )
+        print(json.dumps(result))
+        return
+
+    results = benchmark(args)
+    text = json.dumps(results, indent=2) + "\n"
+    if args.output is None:
+        sys.stdout.write(text)
+    else:
+        with open(args.output, "w") as f:
+            f.write(text)
+
+    if args.baseline is not None:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        for name, key, before, after in regressions:
+            print(
+                "Regression: %s %s %.4g -> %.4g" % (name, key, before, after),
+                file=sys.stderr,
+            )
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+#
+# Copyright (c) 2022 Kumitaka Izumi
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+
+import argparse
+import marshal
+import os
+import py_compile
+import re
+import shutil
+import tempfile
+import zipapp
+import zlib
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+PACKAGE = "horoscopy"
+PACKAGE_ROOT = os.path.join(ROOT, PACKAGE)
+BUNDLE = "res.bundle"
+
+# Per-day trees, e.g., sol2luna/2000/01.txt, are expanded from smaller tables
+# which the charts compute from, so they are left out
+DAY_FILE = re.compile(r"\w+/\d{4}/\d{2}\.txt$")
+
+
+def copy_sources(src, dst):
+    # Copy the modules only; each res/ is packed into a bundle instead
+    for name in sorted(os.listdir(src)):
+        path = os.path.join(src, name)
+        if os.path.isdir(path):
+            if name not in ("res", "__pycache__"):
+                copy_sources(path, os.path.join(dst, name))
+        elif name.endswith(".py"):
+            os.makedirs(dst, exist_ok=True)
+            shutil.copy(path, dst)
+            # zipimport never writes bytecode, so ship it next to the source
+            py_compile.compile(
+                path,
+                cfile=os.path.join(dst, name + "c"),
+                dfile=os.path.join(PACKAGE, os.path.relpath(path, PACKAGE_ROOT)),
+                doraise=True,
+                invalidation_mode=py_compile.PycInvalidationMode.UNCHECKED_HASH,
+            )
+
+
+def make_bundle(res, filename):
+    # Scripts that generate the resources are not needed at run time
+    # Same format as read by horoscopy.registry
+    bundle = {}
+    for dirpath, dirnames, filenames in os.walk(res):
+        dirnames[:] = sorted(x for x in dirnames if x != "__pycache__")
+        for name in sorted(filenames):
+            path = os.path.join(dirpath, name)
+            key = os.path.relpath(path, res).replace(os.sep, "/")
+            if name.endswith(".py") or DAY_FILE.match(key):
+                continue
+            with open(path, "rb") as f:
+                bundle[key] = f.read()
+    with open(filename, "wb") as f:
+        f.write(zlib.compress(marshal.dumps(bundle), 9))
+    return len(bundle)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Make a zipapp of HoroscoPy")
+    parser.add_argument("--output", default="horoscopy.pyz", help="Output filename")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        package = os.path.join(tmp, PACKAGE)
+        copy_sources(PACKAGE_ROOT, package)
+
+        for system in sorted(os.listdir(package)):
+            res = os.path.join(PACKAGE_ROOT, system, "res")
+            if os.path.isdir(res):
+                count = make_bundle(res, os.path.join(package, system, BUNDLE))
+                print("%s: %d files" % (system, count))
+
+        zipapp.create_archive(
+            tmp,
+            args.output,
+            interpreter="/usr/bin/env python3",
+            main=PACKAGE + ".__main__:main",
+        )
+    print("%s: %d bytes" % (args.output, os.path.getsize(args.output)))
+
+
+if __name__ == "__main__":
+    main()